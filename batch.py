@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from gridmap import GridMap
+from pathengine import PathfindingEngine
+
+# Same map size and number of walls as the pathfinding windows (768x512 with 16 pixel tiles)
+BATCH_ROWS = 48
+BATCH_COLS = 32
+BATCH_WALLS = 500
+
+# Algorithm name -> [PathfindingEngine method, keyword arguments]
+ALGORITHMS = {
+    "dfs": ["dfs", {}],
+    "bfs": ["bfs", {}],
+    "dijkstra": ["dijkstra", {"stop_at_end": True}],
+    # One-to-all: settles every reachable tile instead of stopping at the end tile
+    "dijkstra-all": ["dijkstra", {}],
+    "a-star": ["a_star", {}],
+    "a-star-manhattan": ["a_star", {"heuristic": "manhattan"}],
+    "a-star-octile": ["a_star", {"heuristic": "octile"}],
+    "a-star-zero": ["a_star", {"heuristic": "zero"}],
+    "jps": ["jump_point_search", {}],
+    "bidirectional-bfs": ["bidirectional_bfs", {}],
+    "bidirectional-a-star": ["bidirectional_a_star", {}],
+}
+
+
+def solve_map(seed: int, rows: int, cols: int, max_walls: int, algorithms: tuple[str, ...]) \
+        -> list[tuple[str, bool, int, int, float]]:
+    """
+    Generates one random map and solves it with each algorithm (runs in a worker process)
+    :param seed: Seed for generating the map
+    :param rows: Number of rows in the map
+    :param cols: Number of columns in the map
+    :param max_walls: The maximum number of walls to generate
+    :param algorithms: Names of the algorithms to run, keys of ALGORITHMS
+    :return: (algorithm, found, path length, nodes expanded, time) for each algorithm
+    :rtype: list[tuple[str, bool, int, int, float]]
+    """
+    grid = GridMap.random(rows, cols, max_walls, seed)
+    out = []
+    for name in algorithms:
+        engine = PathfindingEngine(grid, record_visits=False)
+        method, options = ALGORITHMS[name]
+        start_time = time.perf_counter()
+        result = getattr(engine, method)(**options)
+        elapsed = time.perf_counter() - start_time
+        out.append((name, result.found, result.cost or 0, result.expanded, elapsed))
+    return out
+
+
+def _solve_map_args(args: tuple) -> list[tuple[str, bool, int, int, float]]:
+    """
+    Unpacks the arguments for solve_map, so it can be used with executor.map
+    :param args: Arguments for solve_map
+    :return: The result of solve_map
+    :rtype: list[tuple[str, bool, int, int, float]]
+    """
+    return solve_map(*args)
+
+
+class BatchSummary:
+    """
+    Totals of a batch run for each algorithm
+    """
+    def __init__(self, algorithms: tuple[str, ...], maps: int, workers: int) -> None:
+        """
+        :param algorithms: Names of the algorithms that were run
+        :param maps: Number of maps solved
+        :param workers: Number of worker processes used
+        """
+        self.algorithms = algorithms
+        self.maps = maps
+        self.workers = workers
+        self.wall_time = 0.0
+        # Algorithm name -> [maps solved, total path length, total nodes expanded, total time]
+        self.totals = {name: [0, 0, 0, 0.0] for name in algorithms}
+
+    def add(self, results: list[tuple[str, bool, int, int, float]]) -> None:
+        """
+        Adds the results of one map to the totals
+        :param results: The results returned by solve_map
+        """
+        for name, found, cost, expanded, elapsed in results:
+            totals = self.totals[name]
+            if found:
+                totals[0] += 1
+                totals[1] += cost
+            totals[2] += expanded
+            totals[3] += elapsed
+
+    def print(self) -> None:
+        """
+        Prints the summary as a table
+        """
+        print(f"Solved {self.maps} maps with {self.workers} workers in {self.wall_time:.2f}s "
+              f"({self.maps / max(self.wall_time, 1e-9):.1f} maps/s)")
+        print(f"\t{'Algorithm':<22}{'Solved':>8}{'Avg path':>10}{'Avg expanded':>14}{'Avg time (ms)':>15}")
+        for name in self.algorithms:
+            solved, cost, expanded, elapsed = self.totals[name]
+            average_cost = cost / solved if solved else 0
+            print(f"\t{name:<22}{solved:>8}{average_cost:>10.1f}{expanded / self.maps:>14.1f}"
+                  f"{elapsed / self.maps * 1000:>15.3f}")
+
+
+def run_batch(maps: int, workers: int = None, algorithms: tuple[str, ...] = tuple(ALGORITHMS),
+              rows: int = BATCH_ROWS, cols: int = BATCH_COLS, max_walls: int = BATCH_WALLS,
+              seed: int = 0) -> BatchSummary:
+    """
+    Generates and solves many random maps in parallel using a process pool
+    :param maps: Number of maps to generate and solve
+    :param workers: Number of worker processes, defaults to the number of CPUs
+    :param algorithms: Names of the algorithms to run on every map, keys of ALGORITHMS
+    :param rows: Number of rows in each map
+    :param cols: Number of columns in each map
+    :param max_walls: The maximum number of walls in each map
+    :param seed: Seed of the first map, map i uses seed + i so runs are repeatable
+    :return: The totals for each algorithm
+    :rtype: BatchSummary
+    """
+    for name in algorithms:
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{name}', expected one of {tuple(ALGORITHMS)}")
+    workers = workers or os.cpu_count() or 1
+    summary = BatchSummary(algorithms, maps, workers)
+    jobs = [(seed + i, rows, cols, max_walls, algorithms) for i in range(maps)]
+    # Several maps per task so the cost of sending work to the processes stays small
+    chunksize = max(1, maps // (workers * 4))
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_solve_map_args, jobs, chunksize=chunksize):
+            summary.add(results)
+    summary.wall_time = time.perf_counter() - start_time
+    return summary
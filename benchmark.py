@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+import tracemalloc
+
+from batch import ALGORITHMS
+from gridmap import GridMap
+from pathengine import PathfindingEngine
+
+# Default matrix: square grid sizes, wall densities and seeds (one map for each combination)
+BENCHMARK_SIZES = (64, 128, 256)
+BENCHMARK_DENSITIES = (0.1, 0.2, 0.3)
+BENCHMARK_SEEDS = (0, 1, 2)
+BENCHMARK_ALGORITHMS = ("dfs", "bfs", "dijkstra", "a-star")
+
+# Columns of every result, in the order they are written
+FIELDS = ("algorithm", "rows", "cols", "density", "seed", "found", "path_length", "expanded", "time_ms", "peak_kib")
+
+
+def run_search(grid: GridMap, name: str, measure_memory: bool = True) -> dict:
+    """
+    Runs one algorithm on a map and measures it
+    The search is timed without memory tracing, then run again with tracing to find its peak memory,
+    because tracing slows every allocation down.
+    :param grid: The map to search
+    :param name: Name of the algorithm, a key of batch.ALGORITHMS
+    :param measure_memory: If the peak memory is measured (takes a second run)
+    :return: found, path_length, expanded, time_ms and peak_kib of the search
+    :rtype: dict
+    """
+    method, options = ALGORITHMS[name]
+    engine = PathfindingEngine(grid, record_visits=False)
+    start_time = time.perf_counter()
+    result = getattr(engine, method)(**options)
+    elapsed = time.perf_counter() - start_time
+
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        getattr(PathfindingEngine(grid, record_visits=False), method)(**options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "found": result.found,
+        "path_length": result.cost,
+        "expanded": result.expanded,
+        "time_ms": round(elapsed * 1000, 3),
+        "peak_kib": None if peak is None else round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(sizes: tuple[int, ...] = BENCHMARK_SIZES, densities: tuple[float, ...] = BENCHMARK_DENSITIES,
+                  seeds: tuple[int, ...] = BENCHMARK_SEEDS, algorithms: tuple[str, ...] = BENCHMARK_ALGORITHMS,
+                  measure_memory: bool = True) -> list[dict]:
+    """
+    Runs every algorithm on one map for each grid size, wall density and seed
+    :param sizes: Widths (and heights) of the square maps
+    :param densities: Chances of each tile being a wall
+    :param seeds: Seeds for the maps, the same seed always gives the same map
+    :param algorithms: Names of the algorithms to run, keys of batch.ALGORITHMS
+    :param measure_memory: If the peak memory of each search is measured
+    :return: One result for each search, with the keys in FIELDS
+    :rtype: list[dict]
+    """
+    for name in algorithms:
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{name}', expected one of {tuple(ALGORITHMS)}")
+    results = []
+    for size in sizes:
+        for density in densities:
+            for seed in seeds:
+                grid = GridMap.random_with_density(size, size, density, seed)
+                for name in algorithms:
+                    result = {"algorithm": name, "rows": size, "cols": size, "density": density, "seed": seed}
+                    result.update(run_search(grid, name, measure_memory))
+                    results.append(result)
+    return results
+
+
+def write_results(results: list[dict], path: str) -> None:
+    """
+    Writes benchmark results to a file, as JSON if the name ends in .json and CSV otherwise
+    :param results: Results from run_benchmark
+    :param path: Path of the file to write
+    """
+    if path.endswith(".json"):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2)
+        return
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_results(results: list[dict]) -> None:
+    """
+    Prints the results averaged over the seeds as a table
+    :param results: Results from run_benchmark
+    """
+    # (algorithm, size, density) -> results for each seed
+    groups = {}
+    for result in results:
+        groups.setdefault((result["algorithm"], result["rows"], result["density"]), []).append(result)
+
+    print(f"\t{'Algorithm':<12}{'Size':>6}{'Density':>9}{'Found':>7}{'Avg path':>10}{'Avg expanded':>14}"
+          f"{'Avg time (ms)':>15}{'Peak (KiB)':>12}")
+    for (name, size, density), group in groups.items():
+        found = [result for result in group if result["found"]]
+        average_path = sum(result["path_length"] for result in found) / len(found) if found else 0
+        average_expanded = sum(result["expanded"] for result in group) / len(group)
+        average_time = sum(result["time_ms"] for result in group) / len(group)
+        peaks = [result["peak_kib"] for result in group if result["peak_kib"] is not None]
+        peak = f"{max(peaks):.1f}" if peaks else "-"
+        print(f"\t{name:<12}{size:>6}{density:>9.2f}{len(found):>7}{average_path:>10.1f}{average_expanded:>14.1f}"
+              f"{average_time:>15.3f}{peak:>12}")
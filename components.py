@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+
+
+class ComponentIndex:
+    """
+    Labels every open tile of a grid with the connected region (component) it is in
+    Two tiles have a path between them exactly when they have the same label, so searches
+    can tell that the end tile is unreachable without exploring anything.
+    The grid keeps the labels correct when walls are added or removed through it.
+    """
+    # Label of wall tiles
+    WALL = -1
+
+    def __init__(self, grid) -> None:
+        """
+        :param grid: The GridMap to label
+        """
+        self.grid = grid
+        self.labels = array("i", [self.WALL]) * grid.size
+        # Label -> number of tiles in the component
+        self.sizes = {}
+        self.__next_label = 0
+
+        for index in range(grid.size):
+            if not grid.walls[index] and self.labels[index] == self.WALL:
+                self.__flood(index, self.__new_label())
+
+    def __new_label(self) -> int:
+        """
+        Creates a label for a new component
+        :return: The new label
+        :rtype: int
+        """
+        label = self.__next_label
+        self.__next_label += 1
+        self.sizes[label] = 0
+        return label
+
+    def __flood(self, source: int, label: int, keep_label: int = None) -> int:
+        """
+        Gives every tile connected to the source tile the passed label
+        :param source: Index of the tile to start from
+        :param label: The label to give the tiles
+        :param keep_label: Tiles that already have this label are not relabelled or passed through
+        :return: Number of tiles relabelled
+        :rtype: int
+        """
+        labels = self.labels
+        self.__take(source, label)
+        count = 1
+        queue = deque([source])
+        while queue:
+            n = queue.popleft()
+            for neighbour in self.grid.neighbours(n):
+                neighbour_label = labels[neighbour]
+                if neighbour_label == label or neighbour_label == keep_label:
+                    continue
+                self.__take(neighbour, label)
+                count += 1
+                queue.append(neighbour)
+        self.sizes[label] += count
+        return count
+
+    def __take(self, index: int, label: int) -> None:
+        """
+        Moves a tile out of its current component and gives it a new label
+        Components that are left with no tiles are dropped.
+        :param index: Index of the tile
+        :param label: The new label of the tile
+        """
+        old_label = self.labels[index]
+        if old_label != self.WALL:
+            self.sizes[old_label] -= 1
+            if self.sizes[old_label] == 0:
+                del self.sizes[old_label]
+        self.labels[index] = label
+
+    def connected(self, index_a: int, index_b: int) -> bool:
+        """
+        Returns if there is a path between two tiles
+        :param index_a: Index of the first tile
+        :param index_b: Index of the second tile
+        :return: True if both tiles are open and in the same component
+        :rtype: bool
+        """
+        label = self.labels[index_a]
+        return label != self.WALL and label == self.labels[index_b]
+
+    def wall_added(self, index: int) -> None:
+        """
+        Updates the labels after a tile became a wall, which may split its component in pieces
+        The pieces next to the new wall are searched at the same time until they meet, and only pieces
+        that turn out to be cut off are relabelled, so the cost depends on the smaller pieces.
+        :param index: Index of the new wall tile
+        """
+        label = self.labels[index]
+        if label == self.WALL:
+            return
+        self.__take(index, self.WALL)
+        if label not in self.sizes:
+            return
+        starts = self.__pieces_around(index)
+        if len(starts) <= 1:
+            return
+
+        # Search i -> search it has met (union-find), searches that met are in the same piece
+        joined = list(range(len(starts)))
+
+        def find(search: int) -> int:
+            while joined[search] != search:
+                joined[search] = joined[joined[search]]
+                search = joined[search]
+            return search
+
+        # Tile -> search that reached it first
+        owner = {start: i for i, start in enumerate(starts)}
+        queues = [deque([start]) for start in starts]
+        pieces = set(range(len(starts)))
+        while len(pieces) > 1:
+            # Pieces whose searches have all run out of tiles are cut off from the rest
+            for piece in [piece for piece in pieces
+                          if all(not queues[i] for i in range(len(starts)) if find(i) == piece)]:
+                pieces.discard(piece)
+                new_label = self.__new_label()
+                for tile, search in owner.items():
+                    if find(search) == piece:
+                        self.__take(tile, new_label)
+                        self.sizes[new_label] += 1
+                if len(pieces) <= 1:
+                    return
+
+            for i, queue in enumerate(queues):
+                if not queue:
+                    continue
+                n = queue.popleft()
+                for neighbour in self.grid.neighbours(n):
+                    search = owner.get(neighbour)
+                    if search is None:
+                        owner[neighbour] = i
+                        queue.append(neighbour)
+                    elif find(search) != find(i):
+                        # Two searches met, so their pieces are still joined
+                        pieces.discard(find(search))
+                        joined[find(search)] = find(i)
+                        pieces.add(find(i))
+
+    def __pieces_around(self, index: int) -> list[int]:
+        """
+        Finds the open tiles next to a tile that may no longer be joined without it
+        Open tiles joined by a path through the 8 tiles around the middle tile are always in the
+        same piece, so only one of them is returned.
+        :param index: Index of the tile in the middle
+        :return: Index of one open tile next to the middle tile for each group around it
+        :rtype: list[int]
+        """
+        grid = self.grid
+        row, col = grid.pos(index)
+        # The 8 tiles around the tile in order, each one is next to the one before it
+        ring = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+        is_open = []
+        for d_row, d_col in ring:
+            ring_row = row + d_row
+            ring_col = col + d_col
+            is_open.append(0 <= ring_row < grid.rows and 0 <= ring_col < grid.cols
+                           and not grid.walls[ring_row * grid.cols + ring_col])
+        if all(is_open):
+            return []
+
+        # Taking the first tile next to (not diagonal to) the middle one from each run of open ring tiles
+        first_closed = is_open.index(False)
+        out = []
+        run_tile = None
+        for i in range(first_closed + 1, first_closed + 9):
+            position = i % 8
+            if not is_open[position]:
+                run_tile = None
+                continue
+            # Even ring positions are the tiles next to the middle one, one of them is enough for each run
+            if position % 2 == 0 and run_tile is None:
+                d_row, d_col = ring[position]
+                run_tile = (row + d_row) * grid.cols + col + d_col
+                out.append(run_tile)
+        return out
+
+    def wall_removed(self, index: int) -> None:
+        """
+        Updates the labels after a wall tile became open, which may join the components around it
+        The smaller components are relabelled into the largest one.
+        :param index: Index of the tile that is no longer a wall
+        """
+        if self.labels[index] != self.WALL:
+            return
+        neighbour_labels = {self.labels[neighbour] for neighbour in self.grid.neighbours(index)}
+        if not neighbour_labels:
+            label = self.__new_label()
+            self.labels[index] = label
+            self.sizes[label] = 1
+            return
+
+        largest = max(neighbour_labels, key=lambda label: self.sizes[label])
+        self.labels[index] = largest
+        self.sizes[largest] += 1
+        if len(neighbour_labels) > 1:
+            self.__flood(index, largest, keep_label=largest)
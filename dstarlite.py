@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from array import array
+from typing import Callable, Iterable, Optional
+
+import heuristics
+import priorityqueue
+from gridmap import GridMap
+from pathengine import LARGE_VALUE, SearchResult
+
+
+class DStarLite:
+    """
+    D* Lite incremental planner
+    Searches backwards from the end tile and keeps its distances between searches, so after walls
+    are added or removed only the tiles whose distance to the end tile changed are expanded again.
+    The start tile can also move along the path (like an agent travelling) without starting over.
+    """
+    def __init__(self, grid: GridMap, heuristic: str = "manhattan",
+                 on_visit: Optional[Callable[[tuple[int, int]], None]] = None) -> None:
+        """
+        :param grid: The grid to plan on, walls should only be changed through update_walls
+        :param heuristic: Name of the heuristic to use, a key of heuristics.HEURISTICS
+        :param on_visit: Called with the position of each tile as it is expanded (e.g. to animate the search)
+        """
+        self.grid = grid
+        self.start = grid.start
+        self.end = grid.end
+        self.on_visit = on_visit
+        self.__estimate = heuristics.get_heuristic(heuristic)
+        # g: Distance to the end tile when the tile was last expanded
+        # rhs: Distance to the end tile through the best neighbour, the tile needs expanding if g != rhs
+        self.g = array("i", [LARGE_VALUE]) * grid.size
+        self.rhs = array("i", [LARGE_VALUE]) * grid.size
+        self.__queue = priorityqueue.PriorityQueue()
+        # Added to new keys once the start tile moves, so the keys already in the queue stay valid
+        self.__key_modifier = 0
+        self.__last_start = self.start
+        # Nodes expanded by every search so far
+        self.total_expanded = 0
+
+        self.rhs[self.end] = 0
+        self.__queue.enqueue(self.end, self.__calculate_key(self.end))
+
+    def __calculate_key(self, index: int) -> tuple[float, int]:
+        """
+        Works out the priority of a tile in the queue
+        :param index: Index of the tile
+        :return: (estimated length of a path from the start tile through the tile, distance to the end tile)
+        :rtype: tuple[float, int]
+        """
+        distance = min(self.g[index], self.rhs[index])
+        h = self.__estimate(self.grid.pos(self.start), self.grid.pos(index))
+        return distance + h + self.__key_modifier, distance
+
+    def __best_neighbour_distance(self, index: int) -> int:
+        """
+        Distance to the end tile through the best neighbour of a tile
+        :param index: Index of the tile
+        :return: The smallest g + 1 of the neighbours, or LARGE_VALUE if none of them can reach the end tile
+        :rtype: int
+        """
+        best = LARGE_VALUE
+        for neighbour in self.grid.neighbours(index):
+            distance = self.g[neighbour] + 1
+            if distance < best:
+                best = distance
+        return best
+
+    def __update_tile(self, index: int) -> None:
+        """
+        Queues a tile if its g and rhs values disagree, otherwise takes it off the queue
+        :param index: Index of the tile
+        """
+        if self.g[index] != self.rhs[index]:
+            self.__queue.enqueue(index, self.__calculate_key(index))
+        elif index in self.__queue:
+            self.__queue.remove(index)
+
+    def __compute_shortest_path(self) -> int:
+        """
+        Expands tiles until the distance from the start tile is correct
+        :return: Number of tiles expanded
+        :rtype: int
+        """
+        grid = self.grid
+        g = self.g
+        rhs = self.rhs
+        queue = self.__queue
+        start = self.start
+        end = self.end
+        expanded = 0
+
+        while not queue.empty() and (queue.peek_priority() < self.__calculate_key(start) or rhs[start] != g[start]):
+            current_node = queue.peek()
+            old_key = queue.peek_priority()
+            new_key = self.__calculate_key(current_node)
+            if old_key < new_key:
+                # The key is out of date because the start tile moved
+                queue.update(current_node, new_key)
+                continue
+
+            expanded += 1
+            if self.on_visit is not None:
+                self.on_visit(grid.pos(current_node))
+            if g[current_node] > rhs[current_node]:
+                # Distance went down (or was found for the first time), pass it on to the neighbours
+                g[current_node] = rhs[current_node]
+                queue.remove(current_node)
+                distance = g[current_node] + 1
+                for neighbour in grid.neighbours(current_node):
+                    if neighbour != end and distance < rhs[neighbour]:
+                        rhs[neighbour] = distance
+                        self.__update_tile(neighbour)
+            else:
+                # Distance went up, neighbours that went through this tile have to find a new best neighbour
+                old_distance = g[current_node] + 1
+                g[current_node] = LARGE_VALUE
+                for neighbour in grid.neighbours(current_node):
+                    if neighbour != end and rhs[neighbour] == old_distance:
+                        rhs[neighbour] = self.__best_neighbour_distance(neighbour)
+                    self.__update_tile(neighbour)
+                self.__update_tile(current_node)
+
+        self.total_expanded += expanded
+        return expanded
+
+    def path(self) -> list[tuple[int, int]]:
+        """
+        Follows the best neighbours from the start tile to the end tile
+        :return: Positions on the path from the start tile to the end tile, empty if there is no path
+        :rtype: list[tuple[int, int]]
+        """
+        grid = self.grid
+        if self.g[self.start] >= LARGE_VALUE:
+            return []
+        index = self.start
+        path = [grid.pos(index)]
+        while index != self.end:
+            index = min(grid.neighbours(index), key=lambda neighbour: self.g[neighbour])
+            path.append(grid.pos(index))
+        return path
+
+    def __result(self, expanded: int) -> SearchResult:
+        """
+        Creates the result of a search
+        :param expanded: Number of tiles the search expanded
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        path = self.path()
+        return SearchResult(bool(path), path, expanded)
+
+    def plan(self) -> SearchResult:
+        """
+        Finds the shortest path from the start tile to the end tile, reusing the previous search
+        :return: The result of the search, expanded only counts the tiles expanded by this call
+        :rtype: SearchResult
+        """
+        return self.__result(self.__compute_shortest_path())
+
+    def update_walls(self, added: Iterable[tuple[int, int]] = (), removed: Iterable[tuple[int, int]] = ()) \
+            -> SearchResult:
+        """
+        Changes walls on the grid and repairs the path
+        :param added: Positions of tiles to make walls
+        :param removed: Positions of wall tiles to make normal tiles
+        :return: The repaired path, expanded counts the tiles that had to be expanded again
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        g = self.g
+        rhs = self.rhs
+        for pos in added:
+            index = grid.index(pos)
+            if index == self.start or index == self.end:
+                raise ValueError("The start and end tiles cannot be walls")
+            if grid.walls[index]:
+                continue
+            grid.set_wall(pos)
+            # Neighbours that went through the new wall have to find a new best neighbour
+            old_distance = g[index] + 1
+            g[index] = rhs[index] = LARGE_VALUE
+            self.__update_tile(index)
+            for neighbour in grid.neighbours(index):
+                if neighbour != self.end and rhs[neighbour] == old_distance:
+                    rhs[neighbour] = self.__best_neighbour_distance(neighbour)
+                    self.__update_tile(neighbour)
+
+        for pos in removed:
+            index = grid.index(pos)
+            if not grid.walls[index]:
+                continue
+            grid.clear_wall(pos)
+            # The tile is queued and passes its distance on to its neighbours when it is expanded
+            rhs[index] = self.__best_neighbour_distance(index)
+            self.__update_tile(index)
+        return self.plan()
+
+    def move_start(self, pos: tuple[int, int]) -> None:
+        """
+        Moves the start tile, e.g. when an agent takes a step along the path
+        :param pos: Position of the new start tile
+        """
+        index = self.grid.index(pos)
+        if self.grid.walls[index]:
+            raise ValueError("The start tile cannot be a wall")
+        self.__key_modifier += self.__estimate(self.grid.pos(self.__last_start), pos)
+        self.__last_start = index
+        self.start = index
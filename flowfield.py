@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import time
+from array import array
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+from gridmap import DIRECTIONS, GridMap
+
+# Direction stored for goal tiles and tiles that cannot reach a goal
+NO_DIRECTION = 255
+# Distance stored for tiles that cannot reach a goal
+UNREACHABLE = -1
+
+
+class FlowField:
+    """
+    Distance to the nearest goal and the direction to move in, for every tile of the grid
+    Built with one Breadth-First Search backwards from all goals at once, after which any number of
+    agents can find their way to the nearest goal by following the directions, without searching.
+    The field has to be built again if the walls of the grid change.
+    """
+    def __init__(self, grid: GridMap, goals: Iterable[int] = None,
+                 on_visit: Optional[Callable[[tuple[int, int]], None]] = None) -> None:
+        """
+        :param grid: The grid to build the field for
+        :param goals: Indexes of the goal tiles, defaults to the grid's end tile
+        :param on_visit: Called with the position of each tile as it is reached (e.g. to animate the search)
+        """
+        self.grid = grid
+        self.goals = [grid.end] if goals is None else list(goals)
+        # Moves to the nearest goal, UNREACHABLE if no goal can be reached
+        self.distances = array("i", [UNREACHABLE]) * grid.size
+        # Position in DIRECTIONS of the move towards the nearest goal
+        self.directions = bytearray([NO_DIRECTION]) * grid.size
+        self.expanded = 0
+
+        start_time = time.perf_counter()
+        self.__build(on_visit)
+        self.build_time = time.perf_counter() - start_time
+
+    def __build(self, on_visit: Optional[Callable[[tuple[int, int]], None]]) -> None:
+        """
+        Runs the Breadth-First Search from every goal tile at the same time
+        :param on_visit: Called with the position of each tile as it is reached
+        """
+        grid = self.grid
+        distances = self.distances
+        directions = self.directions
+        cols = grid.cols
+        # Index offset of a move -> its position in DIRECTIONS, moves between rows are added last
+        # so they win when a grid with one column gives two moves the same offset
+        moves = {}
+        for direction, (d_row, d_col) in sorted(enumerate(DIRECTIONS), key=lambda item: item[1][0] != 0):
+            moves[d_row * cols + d_col] = direction
+
+        queue = deque()
+        for goal in self.goals:
+            if grid.walls[goal] or distances[goal] == 0:
+                continue
+            distances[goal] = 0
+            queue.append(goal)
+        while queue:
+            n = queue.popleft()
+            self.expanded += 1
+            if on_visit is not None:
+                on_visit(grid.pos(n))
+            distance = distances[n] + 1
+            for neighbour in grid.neighbours(n):
+                if distances[neighbour] != UNREACHABLE:
+                    continue
+                distances[neighbour] = distance
+                # The neighbour moves back towards this tile
+                directions[neighbour] = moves[n - neighbour]
+                queue.append(neighbour)
+
+    def direction(self, pos: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """
+        Gets the move towards the nearest goal from a tile
+        :param pos: Position of the tile
+        :return: Offset (row, col) of the move, or None at a goal or if no goal can be reached
+        :rtype: Optional[tuple[int, int]]
+        """
+        direction = self.directions[self.grid.index(pos)]
+        return None if direction == NO_DIRECTION else DIRECTIONS[direction]
+
+    def distance(self, pos: tuple[int, int]) -> int:
+        """
+        Gets the number of moves from a tile to the nearest goal
+        :param pos: Position of the tile
+        :return: The number of moves, or UNREACHABLE if no goal can be reached
+        :rtype: int
+        """
+        return self.distances[self.grid.index(pos)]
+
+    def path_from(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Follows the directions from a tile to the nearest goal
+        :param pos: Position of the tile to start from
+        :return: Positions on the path from the tile to the goal, empty if no goal can be reached
+        :rtype: list[tuple[int, int]]
+        """
+        grid = self.grid
+        index = grid.index(pos)
+        if self.distances[index] == UNREACHABLE:
+            return []
+        path = [pos]
+        direction = self.directions[index]
+        while direction != NO_DIRECTION:
+            d_row, d_col = DIRECTIONS[direction]
+            index += d_row * grid.cols + d_col
+            path.append(grid.pos(index))
+            direction = self.directions[index]
+        return path
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+        Memory used by the distance and direction arrays
+        :return: Size of the arrays in bytes
+        :rtype: int
+        """
+        return self.distances.itemsize * len(self.distances) + len(self.directions)
+
+    def report(self) -> str:
+        """
+        Describes the field that was built
+        :return: Number of goals, tiles reached, memory used and build time
+        :rtype: str
+        """
+        return f"{len(self.goals)} goals, {self.expanded} tiles reached, " \
+               f"{self.memory_bytes / 1024:.1f} KiB, built in {self.build_time:.4f}s"
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import random
+
+from components import ComponentIndex
+
+try:
+    import numpy
+except ImportError:
+    # Maps are generated with the random module instead (much slower on large grids)
+    numpy = None
+
+# Offsets (row, col) to the neighbouring tiles, in the order they are returned by default
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+
+class GridMap:
+    """
+    Compact grid used by the pathfinding engine
+    Tiles are stored in flat arrays indexed by `row * cols + col` and neighbours are
+    worked out from the index, so no per-tile objects are needed.
+    """
+    def __init__(self, rows: int, cols: int, walls=None) -> None:
+        """
+        :param rows: Number of rows in the grid (the first coordinate of a position)
+        :param cols: Number of columns in the grid (the second coordinate of a position)
+        :param walls: Wall flags to use for the tiles (e.g. mapfile.MappedWalls), defaults to no walls
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        # 1 for a wall tile, 0 otherwise
+        self.walls = bytearray(self.size) if walls is None else walls
+        self.start = 0
+        self.end = 0
+        # Connected regions of the map, only kept once build_components has been called
+        self.components = None
+
+    def index(self, pos: tuple[int, int]) -> int:
+        """
+        Converts a position into a flat index
+        :param pos: Position of the tile
+        :return: Index of the tile
+        :rtype: int
+        """
+        row, col = pos
+        return row * self.cols + col
+
+    def pos(self, index: int) -> tuple[int, int]:
+        """
+        Converts a flat index into a position
+        :param index: Index of the tile
+        :return: Position of the tile
+        :rtype: tuple[int, int]
+        """
+        return divmod(index, self.cols)
+
+    @property
+    def start_pos(self) -> tuple[int, int]:
+        """
+        Position of the start tile
+        :rtype: tuple[int, int]
+        """
+        return self.pos(self.start)
+
+    @start_pos.setter
+    def start_pos(self, pos: tuple[int, int]) -> None:
+        self.start = self.index(pos)
+
+    @property
+    def end_pos(self) -> tuple[int, int]:
+        """
+        Position of the end tile
+        :rtype: tuple[int, int]
+        """
+        return self.pos(self.end)
+
+    @end_pos.setter
+    def end_pos(self, pos: tuple[int, int]) -> None:
+        self.end = self.index(pos)
+
+    def is_wall(self, pos: tuple[int, int]) -> bool:
+        """
+        Returns if the tile at the position is a wall tile
+        :param pos: Position of the tile
+        :return: True if the tile is a wall tile
+        :rtype: bool
+        """
+        return self.walls[self.index(pos)] == 1
+
+    def set_wall(self, pos: tuple[int, int]) -> None:
+        """
+        Makes the tile at the position a wall tile
+        :param pos: Position of the tile
+        """
+        index = self.index(pos)
+        self.walls[index] = 1
+        if self.components is not None:
+            self.components.wall_added(index)
+
+    def clear_wall(self, pos: tuple[int, int]) -> None:
+        """
+        Makes the tile at the position a normal tile
+        :param pos: Position of the tile
+        """
+        index = self.index(pos)
+        self.walls[index] = 0
+        if self.components is not None:
+            self.components.wall_removed(index)
+
+    def build_components(self) -> ComponentIndex:
+        """
+        Labels the connected regions of the map so unreachable end tiles are found instantly
+        The labels are kept up to date by set_wall and clear_wall, and dropped when a new map is generated.
+        :return: The component index
+        :rtype: ComponentIndex
+        """
+        self.components = ComponentIndex(self)
+        return self.components
+
+    def connected(self, index_a: int, index_b: int) -> bool:
+        """
+        Returns if there could be a path between two tiles
+        :param index_a: Index of the first tile
+        :param index_b: Index of the second tile
+        :return: False if the tiles are known to be in different regions, True otherwise
+        :rtype: bool
+        """
+        return self.components is None or self.components.connected(index_a, index_b)
+
+    def neighbours(self, index: int, directions: tuple[tuple[int, int], ...] = None) -> list[int]:
+        """
+        Gets the indexes of all non-wall tiles next to a tile (up, down, left and right)
+        :param index: Index of the tile
+        :param directions: Offsets (row, col) to check in order, defaults to DIRECTIONS
+        :return: Indexes of the neighbouring tiles that are not walls
+        :rtype: list[int]
+        """
+        if directions is not None:
+            return self.__neighbours_in_order(index, directions)
+        walls = self.walls
+        cols = self.cols
+        col = index % cols
+        out = []
+        if col + 1 < cols and not walls[index + 1]:
+            out.append(index + 1)
+        if index + cols < self.size and not walls[index + cols]:
+            out.append(index + cols)
+        if col > 0 and not walls[index - 1]:
+            out.append(index - 1)
+        if index >= cols and not walls[index - cols]:
+            out.append(index - cols)
+        return out
+
+    def diagonal_neighbours(self, index: int) -> list[int]:
+        """
+        Gets the indexes of all non-wall tiles diagonally next to a tile
+        A diagonal move is only allowed if both tiles it passes between are not walls, so paths never cut corners.
+        :param index: Index of the tile
+        :return: Indexes of the diagonal tiles that can be moved to
+        :rtype: list[int]
+        """
+        walls = self.walls
+        cols = self.cols
+        col = index % cols
+        up = index >= cols and not walls[index - cols]
+        down = index + cols < self.size and not walls[index + cols]
+        left = col > 0 and not walls[index - 1]
+        right = col + 1 < cols and not walls[index + 1]
+        out = []
+        if down and right and not walls[index + cols + 1]:
+            out.append(index + cols + 1)
+        if down and left and not walls[index + cols - 1]:
+            out.append(index + cols - 1)
+        if up and left and not walls[index - cols - 1]:
+            out.append(index - cols - 1)
+        if up and right and not walls[index - cols + 1]:
+            out.append(index - cols + 1)
+        return out
+
+    def __neighbours_in_order(self, index: int, directions: tuple[tuple[int, int], ...]) -> list[int]:
+        """
+        Gets the indexes of all non-wall neighbours of a tile in the order of the passed directions
+        :param index: Index of the tile
+        :param directions: Offsets (row, col) to check in order
+        :return: Indexes of the neighbouring tiles that are not walls
+        :rtype: list[int]
+        """
+        row, col = divmod(index, self.cols)
+        out = []
+        for x, y in directions:
+            neighbour_row = row + x
+            neighbour_col = col + y
+            if neighbour_row < 0 or neighbour_row >= self.rows or neighbour_col < 0 or neighbour_col >= self.cols:
+                continue
+            neighbour = neighbour_row * self.cols + neighbour_col
+            if not self.walls[neighbour]:
+                out.append(neighbour)
+        return out
+
+    def random_position(self) -> tuple[int, int]:
+        """
+        Generates a random position on the grid
+        :return: Randomly generated position tuple
+        :rtype: tuple[int, int]
+        """
+        return random.randint(0, self.rows - 1), random.randint(0, self.cols - 1)
+
+    def generate(self, max_walls: int, seed: int = None) -> None:
+        """
+        Generates a random map: walls at max_walls random positions (some may land on the same tile),
+        then distinct start and end tiles picked from the tiles that are not walls
+        :param max_walls: The maximum number of walls to generate
+        :param seed: Seed for the map, the same seed always gives the same map
+        """
+        self.components = None
+        if numpy is not None:
+            rng = numpy.random.default_rng(seed)
+            walls = numpy.zeros(self.size, dtype=numpy.uint8)
+            walls[rng.integers(0, self.size, size=max_walls)] = 1
+            self.walls = bytearray(walls.data)
+            self.__place_start_and_end(rng)
+            return
+
+        rng = random.Random(seed)
+        self.walls = bytearray(self.size)
+        for _ in range(max_walls):
+            self.walls[rng.randrange(self.size)] = 1
+        self.__place_start_and_end(rng)
+
+    def generate_with_density(self, wall_density: float, seed: int = None) -> None:
+        """
+        Generates a random map where each tile is a wall with the passed probability,
+        then picks distinct start and end tiles from the tiles that are not walls
+        :param wall_density: Chance of each tile being a wall (0 to 1)
+        :param seed: Seed for the map, the same seed always gives the same map
+        """
+        self.components = None
+        if numpy is not None:
+            rng = numpy.random.default_rng(seed)
+            walls = (rng.random(self.size) < wall_density).view(numpy.uint8)
+            self.walls = bytearray(walls.data)
+            self.__place_start_and_end(rng)
+            return
+
+        rng = random.Random(seed)
+        self.walls = bytearray(rng.random() < wall_density for _ in range(self.size))
+        self.__place_start_and_end(rng)
+
+    def place_start_and_end(self, seed: int = None) -> None:
+        """
+        Picks two different tiles that are not walls for the start and end tiles
+        :param seed: Seed for picking the tiles
+        """
+        self.__place_start_and_end(random.Random(seed))
+
+    def __place_start_and_end(self, rng) -> None:
+        """
+        Picks two different tiles that are not walls for the start and end tiles
+        :param rng: The numpy Generator or random.Random used for the map
+        """
+        if numpy is not None and isinstance(rng, numpy.random.Generator):
+            open_tiles = numpy.flatnonzero(numpy.frombuffer(self.walls, dtype=numpy.uint8) == 0)
+            if len(open_tiles) < 2:
+                raise ValueError("The map needs at least two tiles that are not walls")
+            self.start, self.end = (int(index) for index in rng.choice(open_tiles, 2, replace=False))
+            return
+
+        open_tiles = [index for index in range(self.size) if not self.walls[index]]
+        if len(open_tiles) < 2:
+            raise ValueError("The map needs at least two tiles that are not walls")
+        self.start, self.end = rng.sample(open_tiles, 2)
+
+    @classmethod
+    def random(cls, rows: int, cols: int, max_walls: int, seed: int = None) -> GridMap:
+        """
+        Creates a randomly generated grid
+        :param rows: Number of rows in the grid
+        :param cols: Number of columns in the grid
+        :param max_walls: The maximum number of walls to generate
+        :param seed: Seed for the map, the same seed always gives the same map
+        :return: The new grid
+        :rtype: GridMap
+        """
+        grid = cls(rows, cols)
+        grid.generate(max_walls, seed)
+        return grid
+
+    @classmethod
+    def random_with_density(cls, rows: int, cols: int, wall_density: float, seed: int = None) -> GridMap:
+        """
+        Creates a randomly generated grid where each tile is a wall with the passed probability
+        :param rows: Number of rows in the grid
+        :param cols: Number of columns in the grid
+        :param wall_density: Chance of each tile being a wall (0 to 1)
+        :param seed: Seed for the map, the same seed always gives the same map
+        :return: The new grid
+        :rtype: GridMap
+        """
+        grid = cls(rows, cols)
+        grid.generate_with_density(wall_density, seed)
+        return grid
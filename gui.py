@@ -1,7 +1,69 @@
+import math
+import time
+
 import pygame
 pygame.font.init()
 
 
+class FrameScheduler:
+    """
+    Decides which algorithm steps are shown as frames
+    By default every step is a frame followed by the GUI's frame length (the original behaviour).
+    With an fps set, the algorithm runs as fast as possible and frames are shown at most fps times a second,
+    each one showing every change made since the last frame.
+    """
+    def __init__(self, fps: float = None, steps_per_frame: int = 1, target_duration: float = None) -> None:
+        """
+        :param fps: Target frames per second, None to wait the GUI's frame length after every frame
+        :param steps_per_frame: Number of algorithm steps per frame, None to show a frame whenever one is due
+        :param target_duration: Roughly how long (in seconds) the whole animation should take, needs fps
+        """
+        if target_duration is not None and fps is None:
+            raise ValueError("target_duration needs an fps")
+        self.fps = fps
+        self.steps_per_frame = steps_per_frame
+        self.target_duration = target_duration
+        self.__steps = 0
+        self.__last_frame = None
+
+    def plan(self, total_steps: int) -> None:
+        """
+        Works out the steps per frame needed to finish within the target duration
+        :param total_steps: Estimate of the number of steps the algorithm will take
+        """
+        if self.target_duration is None:
+            return
+        frames = max(1, int(self.target_duration * self.fps))
+        self.steps_per_frame = max(1, math.ceil(total_steps / frames))
+
+    def frame_due(self) -> bool:
+        """
+        Records an algorithm step and returns if a frame should be shown for it
+        :return: True if the GUI should present a frame now
+        :rtype: bool
+        """
+        self.__steps += 1
+        if self.__last_frame is None:
+            return True
+        if self.steps_per_frame is not None:
+            return self.__steps >= self.steps_per_frame
+        return time.perf_counter() - self.__last_frame >= 1 / self.fps
+
+    def frame_presented(self, frame_length: float) -> None:
+        """
+        Records that a frame was shown and waits until the next frame can start
+        :param frame_length: The GUI's frame length, used when no fps is set
+        """
+        if self.fps is None:
+            time.sleep(frame_length)
+        elif self.__last_frame is not None:
+            remaining = self.__last_frame + 1 / self.fps - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+        self.__steps = 0
+        self.__last_frame = time.perf_counter()
+
+
 class GUI:
     """
     Class for creating a GUI object
@@ -14,6 +76,7 @@ class GUI:
         self._width = width
         self._height = height
         self.window = None
+        self.scheduler = FrameScheduler()
 
     def _create_window(self, caption: str) -> None:
         """
@@ -23,9 +86,17 @@ class GUI:
         self.window = pygame.display.set_mode((self._width, self._height))
         pygame.display.set_caption(caption)
 
-    def draw(self) -> None:
+    def set_scheduler(self, scheduler: FrameScheduler) -> None:
+        """
+        Sets how algorithm steps are turned into frames
+        :param scheduler: The new frame scheduler
+        """
+        self.scheduler = scheduler
+
+    def draw(self, force: bool = False) -> None:
         """
         Redraws the window
+        :param force: If True a frame is shown even if the scheduler says one is not due
         """
         pass
 
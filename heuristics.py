@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import math
+from typing import Callable
+
+# Cost of a diagonal move when diagonal moves are allowed
+DIAGONAL_COST = math.sqrt(2)
+
+
+def manhattan(pos_a: tuple[int, int], pos_b: tuple[int, int]) -> float:
+    """
+    Number of up, down, left and right moves between two positions when there are no walls
+    The exact distance on an open 4-connected grid, but it overestimates when diagonal moves are allowed.
+    :param pos_a: Position A (current node)
+    :param pos_b: Position B (end node)
+    :return: Estimated distance between the two nodes
+    :rtype: float
+    """
+    ax, ay = pos_a
+    bx, by = pos_b
+    return abs(ax - bx) + abs(ay - by)
+
+
+def octile(pos_a: tuple[int, int], pos_b: tuple[int, int]) -> float:
+    """
+    Distance between two positions when diagonal moves are allowed and there are no walls
+    Moves diagonally until level with position B, then straight.
+    :param pos_a: Position A (current node)
+    :param pos_b: Position B (end node)
+    :return: Estimated distance between the two nodes
+    :rtype: float
+    """
+    ax, ay = pos_a
+    bx, by = pos_b
+    dx = abs(ax - bx)
+    dy = abs(ay - by)
+    return max(dx, dy) + (DIAGONAL_COST - 1) * min(dx, dy)
+
+
+def euclidean(pos_a: tuple[int, int], pos_b: tuple[int, int]) -> float:
+    """
+    Uses Pythagoras' theorem to calculate the straight-line distance between two positions
+    Never more than the real distance, but looser than Manhattan or octile distance.
+    :param pos_a: Position A (current node)
+    :param pos_b: Position B (end node)
+    :return: Estimated distance between the two nodes
+    :rtype: float
+    """
+    ax, ay = pos_a
+    bx, by = pos_b
+    return math.sqrt((ax - bx) ** 2 + (ay - by) ** 2)
+
+
+def zero(pos_a: tuple[int, int], pos_b: tuple[int, int]) -> float:
+    """
+    Estimates every distance as 0, which makes A* Search behave like Dijkstra's Algorithm
+    :param pos_a: Position A (current node)
+    :param pos_b: Position B (end node)
+    :return: 0
+    :rtype: float
+    """
+    return 0
+
+
+# Heuristic name -> function estimating the distance between two positions
+HEURISTICS: dict[str, Callable[[tuple[int, int], tuple[int, int]], float]] = {
+    "manhattan": manhattan,
+    "octile": octile,
+    "euclidean": euclidean,
+    "zero": zero,
+}
+DEFAULT_HEURISTIC = "euclidean"
+
+
+def get_heuristic(name: str) -> Callable[[tuple[int, int], tuple[int, int]], float]:
+    """
+    Looks up a heuristic by name
+    :param name: Name of the heuristic, a key of HEURISTICS
+    :return: The heuristic function
+    :rtype: Callable[[tuple[int, int], tuple[int, int]], float]
+    """
+    if name not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{name}', expected one of {tuple(HEURISTICS)}")
+    return HEURISTICS[name]
+
+
+class HeuristicStats:
+    """
+    Counts the searches run with each heuristic, the nodes they expanded and the time they took
+    """
+    def __init__(self) -> None:
+        # Heuristic name -> [searches, total nodes expanded, total time]
+        self.totals = {}
+
+    def add(self, name: str, expanded: int, elapsed: float) -> None:
+        """
+        Adds one search to the counters
+        :param name: Name of the heuristic used
+        :param expanded: Number of nodes the search expanded
+        :param elapsed: Time the search took in seconds
+        """
+        totals = self.totals.setdefault(name, [0, 0, 0.0])
+        totals[0] += 1
+        totals[1] += expanded
+        totals[2] += elapsed
+
+    def print(self) -> None:
+        """
+        Prints the average nodes expanded and time for each heuristic as a table
+        """
+        print(f"\t{'Heuristic':<12}{'Searches':>10}{'Avg expanded':>14}{'Avg time (ms)':>15}")
+        for name, (searches, expanded, elapsed) in self.totals.items():
+            print(f"\t{name:<12}{searches:>10}{expanded / searches:>14.1f}{elapsed / searches * 1000:>15.3f}")
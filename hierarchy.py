@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from itertools import chain
+from typing import Callable, Optional
+
+import heuristics
+import priorityqueue
+from gridmap import GridMap
+
+
+class ClusterGraph:
+    """
+    Abstract graph used by Hierarchical Pathfinding A* (HPA*)
+    The grid is split into square clusters. Where two clusters touch, the open gaps between them
+    (entrances) get one or two transition tiles, and the distances between the transition tiles of each
+    cluster are worked out in advance. A query searches this much smaller graph and then only finds the
+    detailed path inside the clusters it passes through.
+    The graph has to be built again if the walls of the grid change.
+    """
+    # Entrances at least this wide get a transition at each end instead of one in the middle
+    WIDE_ENTRANCE = 6
+
+    def __init__(self, grid: GridMap, cluster_size: int = 10) -> None:
+        """
+        :param grid: The grid to build the graph for
+        :param cluster_size: Width and height of each cluster in tiles
+        """
+        if cluster_size < 1:
+            raise ValueError("The cluster size must be at least 1")
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_cols = math.ceil(grid.cols / cluster_size)
+        self.cluster_count = math.ceil(grid.rows / cluster_size) * self.cluster_cols
+        # Transition tile -> {transition tile it has an edge to: cost of the edge}
+        self.edges = {}
+        # Cluster -> transition tiles in it
+        self.cluster_nodes = {}
+
+        start_time = time.perf_counter()
+        self.__find_entrances()
+        self.__connect_clusters()
+        self.build_time = time.perf_counter() - start_time
+
+    def cluster_of(self, index: int) -> int:
+        """
+        Works out which cluster a tile is in
+        :param index: Index of the tile
+        :return: Number of the cluster
+        :rtype: int
+        """
+        row, col = divmod(index, self.grid.cols)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def __add_transition(self, tile_a: int, tile_b: int) -> None:
+        """
+        Adds two tiles next to each other in different clusters and the edge between them
+        :param tile_a: Index of the tile in the first cluster
+        :param tile_b: Index of the tile in the second cluster
+        """
+        self.edges.setdefault(tile_a, {})[tile_b] = 1
+        self.edges.setdefault(tile_b, {})[tile_a] = 1
+        self.cluster_nodes.setdefault(self.cluster_of(tile_a), set()).add(tile_a)
+        self.cluster_nodes.setdefault(self.cluster_of(tile_b), set()).add(tile_b)
+
+    def __add_entrances(self, pairs: list[tuple[int, int]]) -> None:
+        """
+        Adds transitions for every entrance along the border between two clusters
+        :param pairs: The tiles next to each other across the border, in order along it
+        """
+        walls = self.grid.walls
+        entrance = []
+        # None closes the last entrance
+        for pair in chain(pairs, [None]):
+            if pair is not None and not walls[pair[0]] and not walls[pair[1]]:
+                entrance.append(pair)
+                continue
+            if len(entrance) >= self.WIDE_ENTRANCE:
+                self.__add_transition(*entrance[0])
+                self.__add_transition(*entrance[-1])
+            elif entrance:
+                self.__add_transition(*entrance[len(entrance) // 2])
+            entrance = []
+
+    def __find_entrances(self) -> None:
+        """
+        Finds the entrances on every border between two clusters
+        """
+        rows = self.grid.rows
+        cols = self.grid.cols
+        size = self.cluster_size
+        # Borders between clusters next to each other along a row
+        for col in range(size, cols, size):
+            for first_row in range(0, rows, size):
+                self.__add_entrances([(row * cols + col - 1, row * cols + col)
+                                      for row in range(first_row, min(first_row + size, rows))])
+        # Borders between clusters next to each other along a column
+        for row in range(size, rows, size):
+            for first_col in range(0, cols, size):
+                self.__add_entrances([((row - 1) * cols + col, row * cols + col)
+                                      for col in range(first_col, min(first_col + size, cols))])
+
+    def __cluster_search(self, source: int, target: int = None) -> dict[int, int]:
+        """
+        Runs a Breadth-First Search from a tile without leaving its cluster
+        :param source: Index of the tile to search from
+        :param target: Index of a tile to stop at, if None every tile in the cluster that can be reached is found
+        :return: Tile -> the tile it was reached from (-1 for the source tile)
+        :rtype: dict[int, int]
+        """
+        grid = self.grid
+        size = self.cluster_size
+        row, col = divmod(source, grid.cols)
+        first_row = row - row % size
+        first_col = col - col % size
+        parents = {source: -1}
+        queue = deque([source])
+        while queue:
+            n = queue.popleft()
+            if n == target:
+                break
+            for neighbour in grid.neighbours(n):
+                if neighbour in parents:
+                    continue
+                row, col = divmod(neighbour, grid.cols)
+                if first_row <= row < first_row + size and first_col <= col < first_col + size:
+                    parents[neighbour] = n
+                    queue.append(neighbour)
+        return parents
+
+    @staticmethod
+    def __distance(parents: dict[int, int], tile: int) -> int:
+        """
+        Counts the moves back to the source tile of a cluster search
+        :param parents: Parents found by the cluster search
+        :param tile: Index of a tile the search reached
+        :return: Number of moves from the source tile to the tile
+        :rtype: int
+        """
+        distance = 0
+        while parents[tile] != -1:
+            tile = parents[tile]
+            distance += 1
+        return distance
+
+    def __link(self, edges: dict[int, dict[int, int]], source: int, nodes: set[int]) -> int:
+        """
+        Adds edges from a tile to every other tile of its cluster that it can reach inside the cluster
+        :param edges: The edges to add to
+        :param source: Index of the tile
+        :param nodes: Tiles of the cluster to link to
+        :return: Number of tiles the cluster search reached
+        :rtype: int
+        """
+        parents = self.__cluster_search(source)
+        for node in nodes:
+            if node != source and node in parents:
+                distance = self.__distance(parents, node)
+                edges.setdefault(source, {})[node] = distance
+                edges.setdefault(node, {})[source] = distance
+        return len(parents)
+
+    def __connect_clusters(self) -> None:
+        """
+        Adds an edge between every two transition tiles that are joined inside their cluster
+        """
+        for nodes in self.cluster_nodes.values():
+            for node in nodes:
+                self.__link(self.edges, node, nodes)
+
+    def find_path(self, start: int, end: int, on_visit: Optional[Callable[[int], None]] = None) \
+            -> tuple[list[int], int]:
+        """
+        Finds a path by searching the abstract graph, then the clusters it passes through
+        The path is usually, but not always, as short as the shortest path.
+        :param start: Index of the start tile
+        :param end: Index of the end tile
+        :param on_visit: Called with the index of each abstract node as it is expanded
+        :return: Indexes of the tiles on the path (empty if no path was found) and the number of nodes
+            expanded (abstract nodes and tiles reached by the cluster searches)
+        :rtype: tuple[list[int], int]
+        """
+        grid = self.grid
+        # Edges from the start and end tiles, only kept for this query
+        extra_edges = {}
+        expanded = 0
+        for tile in (start, end):
+            if tile not in self.edges:
+                expanded += self.__link(extra_edges, tile, self.cluster_nodes.get(self.cluster_of(tile), set()))
+        if self.cluster_of(start) == self.cluster_of(end):
+            # The path may not need to leave the cluster
+            expanded += self.__link(extra_edges, start, {end})
+
+        # A* Search over the abstract graph
+        end_pos = grid.pos(end)
+        shortest_path = {start: 0}
+        parents = {start: -1}
+        closed = set()
+        nodes_to_visit = priorityqueue.PriorityQueue()
+        nodes_to_visit.enqueue(start, 0)
+        while not nodes_to_visit.empty():
+            current_node = nodes_to_visit.dequeue()
+            closed.add(current_node)
+            expanded += 1
+            if on_visit is not None:
+                on_visit(current_node)
+            if current_node == end:
+                break
+            edges = chain(self.edges.get(current_node, {}).items(), extra_edges.get(current_node, {}).items())
+            for neighbour, cost in edges:
+                if neighbour in closed:
+                    continue
+                g = shortest_path[current_node] + cost
+                if g < shortest_path.get(neighbour, g + 1):
+                    shortest_path[neighbour] = g
+                    parents[neighbour] = current_node
+                    nodes_to_visit.enqueue(neighbour, g + heuristics.manhattan(grid.pos(neighbour), end_pos))
+        if end not in closed:
+            return [], expanded
+
+        abstract_path = []
+        node = end
+        while node != -1:
+            abstract_path.append(node)
+            node = parents[node]
+        abstract_path.reverse()
+
+        # Refining: a transition is a single move, any other edge is searched for inside its cluster
+        path = [start]
+        for node, next_node in zip(abstract_path, abstract_path[1:]):
+            if self.cluster_of(node) != self.cluster_of(next_node):
+                path.append(next_node)
+                continue
+            cluster_parents = self.__cluster_search(node, next_node)
+            expanded += len(cluster_parents)
+            section = []
+            tile = next_node
+            while tile != node:
+                section.append(tile)
+                tile = cluster_parents[tile]
+            path.extend(reversed(section))
+        return path, expanded
+
+    def report(self) -> str:
+        """
+        Describes the graph that was built
+        :return: Cluster size, number of clusters, transition tiles and edges, and build time
+        :rtype: str
+        """
+        edge_count = sum(len(neighbours) for neighbours in self.edges.values()) // 2
+        return f"{self.cluster_count} clusters of {self.cluster_size}x{self.cluster_size}, " \
+               f"{len(self.edges)} abstract nodes, {edge_count} edges, built in {self.build_time:.4f}s"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import random
+import time
+from array import array
+from collections import deque
+
+from gridmap import GridMap
+
+
+class LandmarkIndex:
+    """
+    Landmark (ALT) preprocessing for running many A* queries on the same map
+    Stores the exact distance from each landmark tile to every tile. By the triangle inequality
+    |d(landmark, end) - d(landmark, tile)| is never more than the real distance from tile to end,
+    and unlike a straight-line estimate it accounts for the walls.
+    The index has to be built again if the walls of the grid change.
+    """
+    SELECTIONS = ("farthest", "random")
+
+    def __init__(self, grid: GridMap, count: int = 8, selection: str = "farthest", seed: int = None) -> None:
+        """
+        :param grid: The grid the landmarks are placed on
+        :param count: Number of landmarks (K)
+        :param selection: How landmarks are picked: "farthest" places each one as far as possible
+            from the ones before it, "random" picks random open tiles
+        :param seed: Seed for the random choices made while picking landmarks
+        """
+        if selection not in self.SELECTIONS:
+            raise ValueError(f"Unknown landmark selection '{selection}', expected one of {self.SELECTIONS}")
+        self.grid = grid
+        self.selection = selection
+        # Smallest array type that can hold every distance, the largest value means unreachable
+        self.typecode = "H" if grid.size < 0xFFFF else "I"
+        self.unreachable = 0xFFFF if self.typecode == "H" else 0xFFFFFFFF
+        self.landmarks = []
+        self.distances = []
+
+        start_time = time.perf_counter()
+        self.__select(count, random.Random(seed))
+        self.build_time = time.perf_counter() - start_time
+
+    def __distances_from(self, source: int) -> array:
+        """
+        Runs a BFS from the source tile to find the distance to every tile
+        :param source: Index of the source tile
+        :return: Distance to every tile, indexed like the grid
+        :rtype: array
+        """
+        grid = self.grid
+        distances = array(self.typecode, [self.unreachable]) * grid.size
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            n = queue.popleft()
+            distance = distances[n] + 1
+            for neighbour in grid.neighbours(n):
+                if distances[neighbour] == self.unreachable:
+                    distances[neighbour] = distance
+                    queue.append(neighbour)
+        return distances
+
+    def __select(self, count: int, rng: random.Random) -> None:
+        """
+        Picks the landmarks and stores the distances from each of them
+        :param count: Number of landmarks to pick
+        :param rng: Random number generator used for the choices
+        """
+        open_tiles = [index for index in range(self.grid.size) if not self.grid.walls[index]]
+        if not open_tiles:
+            return
+        count = min(count, len(open_tiles))
+
+        if self.selection == "random":
+            for landmark in rng.sample(open_tiles, count):
+                self.landmarks.append(landmark)
+                self.distances.append(self.__distances_from(landmark))
+            return
+
+        # Farthest: start from the tile farthest from a random tile, then keep adding the tile
+        # with the largest distance to its closest landmark
+        seed_distances = self.__distances_from(rng.choice(open_tiles))
+        closest = array(self.typecode, [self.unreachable]) * self.grid.size
+        candidate = max(open_tiles, key=lambda index: self.__reachable_distance(seed_distances, index))
+        while len(self.landmarks) < count:
+            distances = self.__distances_from(candidate)
+            self.landmarks.append(candidate)
+            self.distances.append(distances)
+            for index in open_tiles:
+                if distances[index] < closest[index]:
+                    closest[index] = distances[index]
+            candidate = max(open_tiles, key=lambda index: self.__reachable_distance(closest, index))
+            if closest[candidate] == 0:
+                # Every tile is already a landmark
+                break
+
+    def __reachable_distance(self, distances: array, index: int) -> int:
+        """
+        Distance used to rank landmark candidates, unreachable tiles rank highest so that
+        every separate region of the map gets a landmark
+        :param distances: Distances to rank by
+        :param index: Index of the tile
+        :return: The distance, or the grid size for unreachable tiles
+        :rtype: int
+        """
+        distance = distances[index]
+        return self.grid.size if distance == self.unreachable else distance
+
+    def target(self, end: int) -> list[tuple[array, int]]:
+        """
+        Gets the landmark data needed to estimate distances to one end tile
+        :param end: Index of the end tile
+        :return: (distances, distance to end) for each landmark that can reach the end tile
+        :rtype: list[tuple[array, int]]
+        """
+        return [(distances, distances[end]) for distances in self.distances if distances[end] != self.unreachable]
+
+    def heuristic(self, index: int, target: list[tuple[array, int]]) -> int:
+        """
+        Lower bound on the distance from a tile to the end tile
+        :param index: Index of the tile
+        :param target: Landmark data for the end tile, from target()
+        :return: The largest triangle-inequality bound over all landmarks
+        :rtype: int
+        """
+        best = 0
+        for distances, end_distance in target:
+            bound = abs(end_distance - distances[index])
+            if bound > best:
+                best = bound
+        return best
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+        Memory used by the stored distances
+        :return: Size of the distance arrays in bytes
+        :rtype: int
+        """
+        return sum(distances.itemsize * len(distances) for distances in self.distances)
+
+    def report(self) -> str:
+        """
+        Describes the landmarks that were built
+        :return: Number of landmarks, how they were picked, memory used and build time
+        :rtype: str
+        """
+        return f"{len(self.landmarks)} landmarks ({self.selection}), " \
+               f"{self.memory_bytes / 1024:.1f} KiB, built in {self.build_time:.4f}s"
@@ -2,11 +2,50 @@ from __future__ import annotations
 import time
 import sys
 
+import batch
+import benchmark
+import heuristics
+import mapfile
+import parallelsort
+import sortengine
+from gui import FrameScheduler
 from sorting import BubbleSort, MergeSort, QuickSort
-from simplesearches import DepthFirstSearch, BreadthFirstSearch
-from pathfinders import DijkstraAlgoSearch, AStarSearch
+from simplesearches import ShowPathfindingGUI, DepthFirstSearch, BreadthFirstSearch, BidirectionalBreadthFirstSearch
+from pathfinders import DijkstraAlgoSearch, AStarSearch, BidirectionalAStarSearch, JumpPointSearch, DStarLiteSearch, \
+    HierarchicalAStarSearch, FlowFieldSearch, CLUSTER_SIZE
 
 ELEMENTS_TO_SORT = 50
+# Number of landmarks used by --a-star-alt
+LANDMARK_COUNT = 8
+# Number of maps solved by --batch when no number is given
+BATCH_MAPS = 1000
+
+# Frame rate and total animation length used by --fast
+FAST_FPS = 60
+FAST_DURATION = 10
+
+# If pathfinders and sorts should run without a window (set by --headless)
+headless = False
+# If animations should be batched into a fixed length (set by --fast)
+fast = False
+# If A* Search can move diagonally (set by --diagonal)
+diagonal = False
+# If Quick Sort uses 3-way partitioning (set by --three-way)
+three_way = False
+
+# Commands that set options instead of running something, these run before all other commands
+option_args = ["--help", "--headless", "--fast", "--workers", "--heuristic", "--diagonal", "--cluster-size", "--map",
+               "--save-map", "--goals", "--elements", "--pivot", "--three-way", "--algorithms"]
+# Commands that can be followed by a number, command -> number (0 means use the default)
+arg_values = {"--batch": BATCH_MAPS, "--workers": 0, "--cluster-size": CLUSTER_SIZE, "--goals": 1, "--elements": 0,
+              "--parallel-sort": parallelsort.PARALLEL_ELEMENTS}
+# Commands that can be followed by a name, command -> [chosen name, possible names (None for any name)]
+arg_names = {"--heuristic": [heuristics.DEFAULT_HEURISTIC, tuple(heuristics.HEURISTICS)],
+             "--map": [None, None],
+             "--save-map": [None, None],
+             "--benchmark-paths": [None, None],
+             "--pivot": ["median-of-three", sortengine.PIVOTS],
+             "--algorithms": [None, None]}
 
 
 def arg_help() -> None:
@@ -23,23 +62,29 @@ def arg_help() -> None:
 
 def arg_all() -> None:
     for arg, [_, func] in all_args.items():
-        if arg == "--help" or arg == "--all":
+        if arg == "--all" or arg == "--batch" or arg == "--benchmark-paths" or arg == "--parallel-sort" \
+                or arg in option_args:
             continue
         # bold, green, reset, green, reset
         print(f"\u001b[1m\u001b[32mRunning:\u001b[0m\u001b[32m {arg}\u001b[0m")
         func()
 
 
+def create_scheduler() -> FrameScheduler:
+    """
+    Creates the frame scheduler used by the --fast command
+    :return: Scheduler that shows FAST_FPS frames a second for about FAST_DURATION seconds
+    :rtype: FrameScheduler
+    """
+    return FrameScheduler(fps=FAST_FPS, target_duration=FAST_DURATION)
+
+
 def arg_bubble_sort() -> None:
     """
     Runs the --bubble-sort command
     Runs and shows the user a bubble sort
     """
-    sorter = BubbleSort(768, 512, ELEMENTS_TO_SORT // 5)
-    sorter.start(0.1)
-    while not sorter.check_events_exit():
-        pass
-    sorter.close()
+    run_sorter(BubbleSort, ELEMENTS_TO_SORT // 5)
 
 
 def arg_merge_sort() -> None:
@@ -47,11 +92,15 @@ def arg_merge_sort() -> None:
     Runs the --merge-sort command
     Runs and shows the user a merge sort
     """
-    sorter = MergeSort(768, 512, ELEMENTS_TO_SORT)
-    sorter.start(0.1)
-    while not sorter.check_events_exit():
-        pass
-    sorter.close()
+    run_sorter(MergeSort, ELEMENTS_TO_SORT)
+
+
+def arg_natural_merge_sort() -> None:
+    """
+    Runs the --natural-merge-sort command
+    Runs and shows the user a bottom-up merge sort of the runs already in order
+    """
+    run_sorter(MergeSort, ELEMENTS_TO_SORT, natural=True)
 
 
 def arg_quick_sort() -> None:
@@ -59,18 +108,53 @@ def arg_quick_sort() -> None:
     Runs the --quick-sort command
     Runs and shows the user a quick sort
     """
-    sorter = QuickSort(768, 512, ELEMENTS_TO_SORT)
+    run_sorter(QuickSort, ELEMENTS_TO_SORT, pivot=arg_names["--pivot"][0], three_way=three_way)
+
+
+def run_sorter(sorter_type: type, elements: int, **options) -> None:
+    """
+    Runs a sort, either in a window or headless if the --headless command was used
+    :param sorter_type: The sorting class to run
+    :param elements: Number of elements to sort, unless the --elements command set a number
+    :param options: Extra keyword arguments for the sort
+    """
+    elements = arg_values["--elements"] or elements
+    if headless:
+        sorter = sorter_type(768, 512, elements, headless=True, **options)
+        start_time = time.perf_counter()
+        sorter.start(0)
+        print(f"\tSorted in {time.perf_counter() - start_time:.4f}s")
+        return
+
+    sorter = sorter_type(768, 512, elements, **options)
+    if fast:
+        sorter.set_scheduler(create_scheduler())
     sorter.start(0.1)
     while not sorter.check_events_exit():
         pass
     sorter.close()
 
 
-def arg_dfs() -> None:
+def run_pathfinder(pathfinder_type: type, **options) -> None:
     """
-    Runs the --dfs command
+    Runs a pathfinder, either in a window or headless if the --headless command was used
+    :param pathfinder_type: The pathfinder class to run
+    :param options: Extra keyword arguments for the pathfinder
     """
-    pathfinder = DepthFirstSearch(768, 512)
+    if arg_names["--map"][0] is not None:
+        options["map_file"] = arg_names["--map"][0]
+    if headless:
+        pathfinder = pathfinder_type(768, 512, headless=True, **options)
+        save_map(pathfinder)
+        start_time = time.perf_counter()
+        pathfinder.start(0)
+        print(f"\tSolved in {time.perf_counter() - start_time:.4f}s")
+        return
+
+    pathfinder = pathfinder_type(768, 512, **options)
+    save_map(pathfinder)
+    if fast:
+        pathfinder.set_scheduler(create_scheduler())
     pathfinder.draw()
     pathfinder.start(0.1)
     while not pathfinder.check_events_exit():
@@ -79,43 +163,250 @@ def arg_dfs() -> None:
     pathfinder.close()
 
 
+def save_map(pathfinder: ShowPathfindingGUI) -> None:
+    """
+    Saves the map of a pathfinder if the --save-map command was used
+    Files ending in .txt are saved as ASCII maps, any others in the binary map format.
+    :param pathfinder: The pathfinder whose map is saved
+    """
+    path = arg_names["--save-map"][0]
+    if path is None:
+        return
+    if path.endswith(".txt"):
+        mapfile.save_ascii(pathfinder.grid, path)
+    else:
+        mapfile.save_map(pathfinder.grid, path)
+    print(f"\tSaved the map to '{path}'")
+
+
+def arg_headless() -> None:
+    """
+    Runs the --headless command
+    Makes all following pathfinding and sorting commands run without opening a window
+    """
+    global headless
+    headless = True
+
+
+def arg_fast() -> None:
+    """
+    Runs the --fast command
+    Makes all following animations run the algorithm at full speed and show it at a fixed frame rate
+    """
+    global fast
+    fast = True
+
+
+def arg_workers() -> None:
+    """
+    Runs the --workers command
+    The number of workers is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_heuristic() -> None:
+    """
+    Runs the --heuristic command
+    The heuristic is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_diagonal() -> None:
+    """
+    Runs the --diagonal command
+    Lets the following A* Search commands move diagonally
+    """
+    global diagonal
+    diagonal = True
+
+
+def arg_map() -> None:
+    """
+    Runs the --map command
+    The map file is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_save_map() -> None:
+    """
+    Runs the --save-map command
+    The file name is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_cluster_size() -> None:
+    """
+    Runs the --cluster-size command
+    The cluster size is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_goals() -> None:
+    """
+    Runs the --goals command
+    The number of goals is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_elements() -> None:
+    """
+    Runs the --elements command
+    The number of elements is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_pivot() -> None:
+    """
+    Runs the --pivot command
+    The pivot is read while checking the arguments, so there is nothing left to do
+    """
+    pass
+
+
+def arg_three_way() -> None:
+    """
+    Runs the --three-way command
+    Makes the following Quick Sort commands gather values equal to the pivot in the middle of each section
+    """
+    global three_way
+    three_way = True
+
+
+def arg_algorithms() -> None:
+    """
+    Runs the --algorithms command
+    The algorithms are read while checking the arguments and by --batch, so there is nothing left to do
+    """
+    pass
+
+
+def arg_batch() -> None:
+    """
+    Runs the --batch command
+    Solves many random maps with every pathfinding algorithm in parallel and prints a summary
+    """
+    algorithms = tuple(batch.ALGORITHMS)
+    if arg_names["--algorithms"][0] is not None:
+        algorithms = tuple(name for name in arg_names["--algorithms"][0].split(",") if name)
+        unknown = [name for name in algorithms if name not in batch.ALGORITHMS]
+        if unknown or not algorithms:
+            # red, reset
+            print(f"\u001b[31m[Command Error]: Unknown algorithms {', '.join(unknown) or '(none given)'}, "
+                  f"expected a comma separated list of {', '.join(batch.ALGORITHMS)}.\u001b[0m")
+            return
+    summary = batch.run_batch(arg_values["--batch"], arg_values["--workers"] or None, algorithms)
+    summary.print()
+
+
+def arg_benchmark_paths() -> None:
+    """
+    Runs the --benchmark-paths command
+    Runs the pathfinding algorithms headless over maps of several sizes and wall densities,
+    prints a summary and writes every result to a file if one was given
+    """
+    results = benchmark.run_benchmark()
+    benchmark.print_results(results)
+    path = arg_names["--benchmark-paths"][0]
+    if path is not None:
+        benchmark.write_results(results, path)
+        print(f"\tSaved {len(results)} results to '{path}'")
+
+
+def arg_parallel_sort() -> None:
+    """
+    Runs the --parallel-sort command
+    Sorts random numbers with the parallel merge sort at several core counts and prints the speedup
+    over the single-process Merge Sort
+    """
+    elements = arg_values["--parallel-sort"]
+    core_counts = parallelsort.default_core_counts(arg_values["--workers"] or None)
+    print(f"\tSorting {elements} numbers with 1 process and with {', '.join(map(str, core_counts))} workers")
+    results = parallelsort.compare_speedup(elements, core_counts)
+    parallelsort.print_speedup(results)
+
+
+def arg_dfs() -> None:
+    """
+    Runs the --dfs command
+    """
+    run_pathfinder(DepthFirstSearch)
+
+
 def arg_bfs() -> None:
     """
     Runs the --bfs command
     """
-    pathfinder = BreadthFirstSearch(768, 512)
-    pathfinder.draw()
-    pathfinder.start(0.1)
-    while not pathfinder.check_events_exit():
-        pass
-
-    pathfinder.close()
+    run_pathfinder(BreadthFirstSearch)
 
 
 def arg_dijkstra_algo() -> None:
     """
     Runs the --dijkstra-algo command
     """
-    pathfinder = DijkstraAlgoSearch(768, 512)
-    pathfinder.draw()
-    pathfinder.start(0.1)
-    while not pathfinder.check_events_exit():
-        pass
-
-    pathfinder.close()
+    run_pathfinder(DijkstraAlgoSearch)
 
 
 def arg_a_star_algo() -> None:
     """
     Runs the --a-star command
     """
-    pathfinder = AStarSearch(768, 512)
-    pathfinder.draw()
-    pathfinder.start(0.1)
-    while not pathfinder.check_events_exit():
-        pass
+    run_pathfinder(AStarSearch, heuristic=arg_names["--heuristic"][0], diagonal=diagonal)
 
-    pathfinder.close()
+
+def arg_a_star_alt() -> None:
+    """
+    Runs the --a-star-alt command
+    """
+    run_pathfinder(AStarSearch, landmark_count=LANDMARK_COUNT, heuristic=arg_names["--heuristic"][0])
+
+
+def arg_hpa_star() -> None:
+    """
+    Runs the --hpa-star command
+    """
+    run_pathfinder(HierarchicalAStarSearch, cluster_size=arg_values["--cluster-size"] or CLUSTER_SIZE)
+
+
+def arg_jps() -> None:
+    """
+    Runs the --jps command
+    """
+    run_pathfinder(JumpPointSearch)
+
+
+def arg_bidirectional_bfs() -> None:
+    """
+    Runs the --bidirectional-bfs command
+    """
+    run_pathfinder(BidirectionalBreadthFirstSearch)
+
+
+def arg_bidirectional_a_star() -> None:
+    """
+    Runs the --bidirectional-a-star command
+    """
+    run_pathfinder(BidirectionalAStarSearch)
+
+
+def arg_d_star_lite() -> None:
+    """
+    Runs the --d-star-lite command
+    """
+    run_pathfinder(DStarLiteSearch)
+
+
+def arg_flow_field() -> None:
+    """
+    Runs the --flow-field command
+    """
+    run_pathfinder(FlowFieldSearch, goals=arg_values["--goals"] or 1)
 
 
 def discard_arg(arg: str) -> None:
@@ -137,9 +428,21 @@ def check_args(args: list[str]) -> list[str]:
     possible_args = []
     arg_keys = all_args.keys()
 
-    for arg in args:
-        # Making --help command run first
-        if arg == "--help":
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        i += 1
+        # Reading the number after commands that take one
+        if arg in arg_values and i < len(args) and args[i].isdigit():
+            arg_values[arg] = int(args[i])
+            i += 1
+        # Reading the name after commands that take one
+        if arg in arg_names and i < len(args) and not args[i].startswith("--") \
+                and (arg_names[arg][1] is None or args[i] in arg_names[arg][1]):
+            arg_names[arg][0] = args[i]
+            i += 1
+        # Making --help and the option commands run first
+        if arg in option_args:
             possible_args = [arg] + possible_args
             continue
         if arg in arg_keys:
@@ -199,12 +502,55 @@ all_args = {
                arg_help],
     "--all" : ["Runs all of the command in order (apart from '--help').",
                arg_all],
+    "--headless": ["Runs the pathfinding and sorting commands without a window and prints the results.",
+                   arg_headless],
+    "--fast": [f"Batches algorithm steps so each animation takes about {FAST_DURATION} seconds.",
+               arg_fast],
+    "--workers": ["Sets the number of processes used by --batch and the most used by --parallel-sort, "
+                  "e.g. '--workers 4' (default: all CPUs).",
+                  arg_workers],
+    "--heuristic": [f"Sets the heuristic used by A* Search, one of {', '.join(heuristics.HEURISTICS)} "
+                    f"(default: {heuristics.DEFAULT_HEURISTIC}), e.g. '--heuristic manhattan'.",
+                    arg_heuristic],
+    "--diagonal": ["Lets --a-star move diagonally (use with '--heuristic octile').",
+                   arg_diagonal],
+    "--map": ["Runs the pathfinders on a map file (binary or ASCII) instead of a random map, e.g. '--map maze.txt'.",
+              arg_map],
+    "--save-map": ["Saves the map of each pathfinder run, as ASCII if the name ends in .txt, e.g. '--save-map maze.gmap'.",
+                   arg_save_map],
+    "--cluster-size": [f"Sets the width and height of the clusters used by --hpa-star, e.g. '--cluster-size 16' "
+                       f"(default: {CLUSTER_SIZE}).",
+                       arg_cluster_size],
+    "--goals": ["Sets the number of goal tiles used by --flow-field, e.g. '--goals 3' (default: 1).",
+                arg_goals],
+    "--elements": [f"Sets the number of elements sorted by the sorting commands, e.g. '--elements 1000000' "
+                   f"(default: {ELEMENTS_TO_SORT}, {ELEMENTS_TO_SORT // 5} for --bubble-sort).",
+                   arg_elements],
+    "--pivot": [f"Sets how --quick-sort picks its pivot, one of {', '.join(sortengine.PIVOTS)} "
+                f"(default: median-of-three), e.g. '--pivot random'.",
+                arg_pivot],
+    "--three-way": ["Makes --quick-sort use 3-way partitioning, which is much faster with many equal values.",
+                    arg_three_way],
+    "--algorithms": [f"Sets the pathfinders run by --batch, any of {', '.join(batch.ALGORITHMS)} "
+                     f"separated by commas, e.g. '--algorithms bfs,a-star' (default: all of them).",
+                     arg_algorithms],
+    "--batch": [f"Solves random maps in parallel with the chosen pathfinders (see --algorithms), e.g. '--batch 500' "
+                f"(default: {BATCH_MAPS}).",
+                arg_batch],
+    "--benchmark-paths": ["Measures DFS, BFS, Dijkstra and A* on maps of several sizes and densities, "
+                          "e.g. '--benchmark-paths results.csv' (.json for JSON).",
+                          arg_benchmark_paths],
     "--bubble-sort": ["Performs a Bubble Sort",
                       arg_bubble_sort],
     "--merge-sort": ["Performs a Merge Sort",
                      arg_merge_sort],
+    "--natural-merge-sort": ["Performs a bottom-up Merge Sort of the runs already in order, with galloping",
+                             arg_natural_merge_sort],
     "--quick-sort": ["Performs a Quick Sort",
                      arg_quick_sort],
+    "--parallel-sort": [f"Times a merge sort over shared memory with 1, 2, 4... worker processes against Merge Sort, "
+                        f"e.g. '--parallel-sort 500000' (default: {parallelsort.PARALLEL_ELEMENTS} numbers).",
+                        arg_parallel_sort],
     "--dfs": ["Performs a DFS",
               arg_dfs],
     "--bfs": ["Performs a BFS",
@@ -213,6 +559,20 @@ all_args = {
                         arg_dijkstra_algo],
     "--a-star": ["Performs A* Search to find shortest path",
                       arg_a_star_algo],
+    "--a-star-alt": [f"Performs A* Search using {LANDMARK_COUNT} precomputed landmarks (ALT) as the heuristic",
+                     arg_a_star_alt],
+    "--hpa-star": ["Performs Hierarchical A* Search (HPA*) over precomputed clusters to find a near-shortest path",
+                   arg_hpa_star],
+    "--jps": ["Performs Jump Point Search to find shortest path",
+              arg_jps],
+    "--bidirectional-bfs": ["Performs a BFS from both the start and the end",
+                            arg_bidirectional_bfs],
+    "--bidirectional-a-star": ["Performs A* Search from both the start and the end to find shortest path",
+                               arg_bidirectional_a_star],
+    "--d-star-lite": ["Performs D* Lite, then changes walls on the path and repairs it without starting over",
+                      arg_d_star_lite],
+    "--flow-field": ["Builds one flow field from the goal tiles that routes any number of agents without searching",
+                     arg_flow_field],
 }
 
 
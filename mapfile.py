@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import mmap
+import struct
+
+from gridmap import GridMap
+
+try:
+    import numpy
+except ImportError:
+    # Wall bitmaps are packed with plain Python instead (much slower on large grids)
+    numpy = None
+
+# Binary map file: header, then one bit per tile (1 for a wall), lowest bit first, indexed like GridMap.walls
+MAGIC = b"GMAP"
+VERSION = 1
+# Magic, version, reserved, rows, columns, start index, end index
+HEADER = struct.Struct("<4sHHIIQQ")
+
+# Characters used for tiles in ASCII maps, any other character is a normal tile
+WALL_CHARS = "#@OTW"
+START_CHAR = "S"
+END_CHAR = "E"
+
+
+class MappedWalls:
+    """
+    Wall flags read straight from the packed bitmap of a memory-mapped map file
+    Can be used in place of GridMap.walls, so a map of any size is opened without unpacking or copying it.
+    Walls changed after loading are only changed in memory, never in the file.
+    """
+    def __init__(self, bits: memoryview, size: int) -> None:
+        """
+        :param bits: The packed wall bitmap
+        :param size: Number of tiles in the map
+        """
+        self.bits = bits
+        self.size = size
+
+    def __len__(self) -> int:
+        """
+        Number of tiles in the map
+        :return: The number of tiles
+        :rtype: int
+        """
+        return self.size
+
+    def __getitem__(self, index: int) -> int:
+        """
+        Gets the wall flag of a tile
+        :param index: Index of the tile
+        :return: 1 for a wall tile, 0 otherwise
+        :rtype: int
+        """
+        return (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def __setitem__(self, index: int, value: int) -> None:
+        """
+        Sets the wall flag of a tile
+        :param index: Index of the tile
+        :param value: 1 for a wall tile, 0 otherwise
+        """
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def count(self, value: int) -> int:
+        """
+        Counts the tiles with a wall flag
+        :param value: 1 to count wall tiles, 0 to count normal tiles
+        :return: The number of tiles with the flag
+        :rtype: int
+        """
+        walls = 0
+        # Counting a chunk at a time so huge maps do not need one huge integer
+        chunk = 1 << 20
+        for start in range(0, len(self.bits), chunk):
+            walls += bin(int.from_bytes(self.bits[start:start + chunk], "little")).count("1")
+        return walls if value else self.size - walls
+
+
+def pack_walls(walls) -> bytes:
+    """
+    Packs wall flags into a bitmap with one bit per tile
+    :param walls: Wall flags of the tiles (GridMap.walls)
+    :return: The packed bitmap
+    :rtype: bytes
+    """
+    if isinstance(walls, MappedWalls):
+        return bytes(walls.bits)
+    if numpy is not None:
+        return numpy.packbits(numpy.frombuffer(walls, dtype=numpy.uint8), bitorder="little").tobytes()
+
+    packed = bytearray((len(walls) + 7) // 8)
+    for bit in range(8):
+        for i, wall in enumerate(walls[bit::8]):
+            if wall:
+                packed[i] |= 1 << bit
+    return bytes(packed)
+
+
+def save_map(grid: GridMap, path: str) -> None:
+    """
+    Saves a map in the binary map format
+    :param grid: The map to save
+    :param path: Path of the file to write
+    """
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, grid.rows, grid.cols, grid.start, grid.end))
+        file.write(pack_walls(grid.walls))
+
+
+def load_map(path: str) -> GridMap:
+    """
+    Loads a map saved in the binary map format
+    The file is memory-mapped, so only the parts of the map that are used are read from disk.
+    :param path: Path of the file to read
+    :return: The loaded map
+    :rtype: GridMap
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' is not a binary map file")
+        _, version, _, rows, cols, start, end = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"Unsupported map file version {version}, expected {VERSION}")
+        size = rows * cols
+        if start >= size or end >= size:
+            raise ValueError("The start and end tiles must be on the map")
+        # Copy-on-write, so changing walls never changes the file
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    bits = memoryview(mapped)[HEADER.size:HEADER.size + (size + 7) // 8]
+    if len(bits) < (size + 7) // 8:
+        raise ValueError(f"'{path}' is too short for a {rows}x{cols} map")
+
+    grid = GridMap(rows, cols, MappedWalls(bits, size))
+    grid.start = start
+    grid.end = end
+    return grid
+
+
+def save_ascii(grid: GridMap, path: str) -> None:
+    """
+    Saves a map as text, one line for each column of the grid (a line of tiles across the window)
+    :param grid: The map to save
+    :param path: Path of the file to write
+    """
+    with open(path, "w") as file:
+        for col in range(grid.cols):
+            line = []
+            for row in range(grid.rows):
+                index = row * grid.cols + col
+                if index == grid.start:
+                    line.append(START_CHAR)
+                elif index == grid.end:
+                    line.append(END_CHAR)
+                else:
+                    line.append(WALL_CHARS[0] if grid.walls[index] else ".")
+            file.write("".join(line) + "\n")
+
+
+def load_ascii(path: str, seed: int = None) -> GridMap:
+    """
+    Loads a map from text, one line for each line of tiles across the window
+    Any of WALL_CHARS is a wall, START_CHAR and END_CHAR mark the start and end tiles and every other
+    character is a normal tile.
+    Moving AI benchmark maps (.map) are read with their own letters once the header is skipped:
+    '@' and 'O' (out of bounds), 'T' (trees) and 'W' (water) are walls, while '.', 'G' (ground) and
+    'S' (swamp) are normal tiles. These maps do not mark start and end tiles, so they are placed randomly.
+    :param path: Path of the file to read
+    :param seed: Seed for picking the start and end tiles if the map does not mark them
+    :return: The loaded map
+    :rtype: GridMap
+    """
+    with open(path) as file:
+        lines = file.read().splitlines()
+    moving_ai = "map" in lines
+    if moving_ai:
+        # Moving AI header (type, height, width), the tiles start after the "map" line
+        lines = lines[lines.index("map") + 1:]
+    while lines and not lines[-1]:
+        lines.pop()
+    if not lines:
+        raise ValueError(f"'{path}' has no tiles")
+
+    grid = GridMap(max(len(line) for line in lines), len(lines))
+    start = end = None
+    for col, line in enumerate(lines):
+        for row, char in enumerate(line):
+            index = row * grid.cols + col
+            if char in WALL_CHARS:
+                grid.walls[index] = 1
+            elif moving_ai:
+                # START_CHAR is a swamp in Moving AI maps, which can be walked through
+                continue
+            elif char == START_CHAR:
+                start = index
+            elif char == END_CHAR:
+                end = index
+    if start is None or end is None:
+        grid.place_start_and_end(seed)
+        # Keeping the tile that was marked, and swapping if the random tile landed on it
+        if start is not None:
+            grid.start, grid.end = start, grid.start if grid.end == start else grid.end
+        if end is not None:
+            grid.start, grid.end = grid.end if grid.start == end else grid.start, end
+    else:
+        grid.start = start
+        grid.end = end
+    return grid
+
+
+def read_map(path: str) -> GridMap:
+    """
+    Loads a map from a binary map file or an ASCII map, whichever the file is
+    :param path: Path of the file to read
+    :return: The loaded map
+    :rtype: GridMap
+    """
+    with open(path, "rb") as file:
+        is_binary = file.read(len(MAGIC)) == MAGIC
+    return load_map(path) if is_binary else load_ascii(path)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterable
+
+from sortengine import SortingEngine
+
+# Values are kept in the shared buffers as C doubles
+TYPECODE = "d"
+# Number of values sorted by the speedup report when no number is given
+PARALLEL_ELEMENTS = 1000000
+
+# Views of the two shared buffers in a worker process, set up once by _attach_buffers
+_blocks = []
+_views = []
+
+
+def _attach_buffers(names: tuple[str, str]) -> None:
+    """
+    Opens the shared buffers in a worker process (runs once when the worker starts)
+    :param names: Names of the two shared memory blocks
+    """
+    for name in names:
+        block = shared_memory.SharedMemory(name=name)
+        _blocks.append(block)
+        _views.append(block.buf.cast(TYPECODE))
+
+
+def _sort_chunk(source: int, start: int, end: int) -> None:
+    """
+    Sorts one chunk of a shared buffer with the single-process merge sort (runs in a worker process)
+    :param source: Which shared buffer holds the chunk (0 or 1)
+    :param start: Index of the first value of the chunk
+    :param end: Index after the last value of the chunk
+    """
+    values = _views[source][start:end].tolist()
+    SortingEngine(values, trace=False).run("merge")
+    _views[source][start:end] = array(TYPECODE, values)
+
+
+def _co_rank(view: memoryview, start: int, middle: int, end: int, position: int) -> tuple[int, int]:
+    """
+    Works out where the first values of a merge come from, without merging
+    :param view: The buffer holding the two sorted runs
+    :param start: Index of the start of the first run
+    :param middle: Index of the start of the second run
+    :param end: Index after the end of the second run
+    :param position: Number of values of the merged run, counted from its start
+    :return: Index in the first run and index in the second run that the merge would have reached
+    :rtype: tuple[int, int]
+    """
+    left_length = middle - start
+    right_length = end - middle
+    low = max(0, position - right_length)
+    high = min(position, left_length)
+    while True:
+        taken = (low + high) // 2
+        i = start + taken
+        j = middle + position - taken
+        if taken < left_length and j > middle and not view[j - 1] < view[i]:
+            # The next value of the first run comes before values already taken from the second run
+            low = taken + 1
+        elif taken > 0 and j < end and view[j] < view[i - 1]:
+            # The next value of the second run comes before values already taken from the first run
+            high = taken - 1
+        else:
+            return i, j
+
+
+def _merge_section(source: int, start: int, middle: int, end: int, first: int, last: int) -> None:
+    """
+    Merges one section of two sorted runs into the other shared buffer (runs in a worker process)
+    Each section is found with a binary search, so one merge can be shared between many workers.
+    :param source: Which shared buffer holds the runs (0 or 1), the merged values go in the other one
+    :param start: Index of the start of the first run
+    :param middle: Index of the start of the second run
+    :param end: Index after the end of the second run
+    :param first: Index of the first merged value this worker writes
+    :param last: Index after the last merged value this worker writes
+    """
+    view = _views[source]
+    i, j = _co_rank(view, start, middle, end, first - start)
+    i_end, j_end = _co_rank(view, start, middle, end, last - start)
+    left = view[i:i_end].tolist()
+    right = view[j:j_end].tolist()
+    left_length = len(left)
+    right_length = len(right)
+
+    merged = []
+    i = j = 0
+    while i < left_length and j < right_length:
+        # Taking from the first run on ties keeps equal values in order
+        if right[j] < left[i]:
+            merged.append(right[j])
+            j += 1
+        else:
+            merged.append(left[i])
+            i += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    _views[1 - source][first:last] = array(TYPECODE, merged)
+
+
+def _run_task(task: tuple) -> None:
+    """
+    Runs a chunk sort or a merge section, so both can be used with executor.map
+    :param task: The function to run followed by its arguments
+    """
+    task[0](*task[1:])
+
+
+def parallel_merge_sort(values: Iterable[float], workers: int = None) -> array:
+    """
+    Sorts numbers with a merge sort spread over a process pool
+    The numbers are copied once into shared memory. Each worker sorts one chunk of it in place, then
+    neighbouring chunks are merged level by level, with every merge split between all the workers.
+    Workers only receive indexes, the numbers themselves are never pickled.
+    :param values: The numbers to sort
+    :param workers: Number of worker processes, defaults to the number of CPUs
+    :return: The sorted numbers
+    :rtype: array
+    """
+    values = array(TYPECODE, values)
+    length = len(values)
+    workers = workers or os.cpu_count() or 1
+    if length < 2:
+        return values
+
+    blocks = [shared_memory.SharedMemory(create=True, size=length * values.itemsize) for _ in range(2)]
+    views = [block.buf.cast(TYPECODE) for block in blocks]
+    try:
+        views[0][:] = values
+        chunk = math.ceil(length / workers)
+        # Index where each sorted run starts, then the number of values
+        bounds = list(range(0, length, chunk)) + [length]
+        names = (blocks[0].name, blocks[1].name)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_buffers, initargs=(names,)) as executor:
+            list(executor.map(_run_task, [(_sort_chunk, 0, start, end) for start, end in zip(bounds, bounds[1:])]))
+
+            source = 0
+            while len(bounds) > 2:
+                tasks = []
+                merged = []
+                pairs = (len(bounds) - 1) // 2
+                # Splitting the merges so every worker gets a section
+                pieces = max(1, workers // pairs)
+                for r in range(0, len(bounds) - 2, 2):
+                    start, middle, end = bounds[r:r + 3]
+                    step = math.ceil((end - start) / pieces)
+                    for first in range(start, end, step):
+                        tasks.append((_merge_section, source, start, middle, end, first, min(first + step, end)))
+                    merged.append(start)
+                # With an odd number of runs the last one is copied across to wait for the next level
+                if len(bounds) % 2 == 0:
+                    views[1 - source][bounds[-2]:length] = views[source][bounds[-2]:length]
+                    merged.append(bounds[-2])
+                merged.append(length)
+                list(executor.map(_run_task, tasks))
+                source = 1 - source
+                bounds = merged
+        return array(TYPECODE, views[source])
+    finally:
+        for view in views:
+            view.release()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def default_core_counts(max_workers: int = None) -> tuple[int, ...]:
+    """
+    Core counts compared by the speedup report: 1, 2, 4... up to the most workers, and the most workers
+    :param max_workers: The most workers to try, defaults to the number of CPUs
+    :return: The core counts
+    :rtype: tuple[int, ...]
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = [2 ** power for power in range(max_workers.bit_length())]
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return tuple(counts)
+
+
+def compare_speedup(elements: int = PARALLEL_ELEMENTS, core_counts: tuple[int, ...] = None,
+                    seed: int = 0) -> list[tuple[int, float, float]]:
+    """
+    Times the parallel merge sort at several core counts against the single-process Merge Sort
+    :param elements: Number of random values to sort
+    :param core_counts: Numbers of worker processes to try, defaults to default_core_counts()
+    :param seed: Seed for the random values
+    :return: The single-process time, then (workers, time, speedup) for each core count
+    :rtype: list[tuple[int, float, float]]
+    """
+    generator = random.Random(seed)
+    data = [generator.random() for _ in range(elements)]
+
+    values = list(data)
+    single_time = SortingEngine(values, trace=False).run("merge").elapsed
+    results = [(0, single_time, 1.0)]
+    for workers in core_counts or default_core_counts():
+        start_time = time.perf_counter()
+        sorted_values = parallel_merge_sort(data, workers)
+        elapsed = time.perf_counter() - start_time
+        if sorted_values.tolist() != values:
+            raise RuntimeError(f"The parallel merge sort with {workers} workers gave the wrong order")
+        results.append((workers, elapsed, single_time / elapsed))
+    return results
+
+
+def print_speedup(results: list[tuple[int, float, float]]) -> None:
+    """
+    Prints the results of compare_speedup as a table
+    :param results: Results from compare_speedup
+    """
+    print(f"\t{'Workers':<16}{'Time (s)':>10}{'Speedup':>9}")
+    for workers, elapsed, speedup in results:
+        name = "single process" if workers == 0 else str(workers)
+        print(f"\t{name:<16}{elapsed:>10.3f}{speedup:>8.2f}x")
@@ -0,0 +1,638 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from typing import Callable, Optional
+
+import heuristics
+import priorityqueue
+from gridmap import GridMap
+from hierarchy import ClusterGraph
+from landmarks import LandmarkIndex
+
+# Large value (like an infinity value)
+LARGE_VALUE = 1000000
+
+
+class SearchResult:
+    """
+    The outcome of running a pathfinding algorithm
+    """
+    def __init__(self, found: bool, path: list[tuple[int, int]], expanded: int,
+                 visit_order: Optional[list[tuple[int, int]]] = None, distances: Optional[array] = None,
+                 path_cost: Optional[float] = None) -> None:
+        """
+        :param found: If a path between the start and end tile was found
+        :param path: Positions of the tiles on the path, from the start tile to the end tile
+        :param expanded: Number of tiles visited by the algorithm
+        :param visit_order: Positions of the tiles in the order the algorithm visited them (if recorded)
+        :param distances: Cost from the start tile to each tile, indexed like the GridMap with
+            LARGE_VALUE for unreachable tiles (only for one-to-all algorithms)
+        :param path_cost: Cost of the path when moves do not all cost 1 (defaults to the number of moves)
+        """
+        self.found = found
+        self.path = path
+        self.expanded = expanded
+        self.visit_order = visit_order
+        self.distances = distances
+        self.path_cost = path_cost
+
+    @property
+    def cost(self) -> Optional[float]:
+        """
+        Cost of the path found (every move costs 1 unless a path cost was given)
+        :return: The cost of the path, or None if no path was found
+        :rtype: Optional[float]
+        """
+        if not self.found:
+            return None
+        return len(self.path) - 1 if self.path_cost is None else self.path_cost
+
+    def __repr__(self) -> str:
+        """
+        String representation of SearchResult
+        :return: Representation of SearchResult
+        :rtype: str
+        """
+        return f"SearchResult(found={self.found}, cost={self.cost}, expanded={self.expanded})"
+
+
+class PathfindingEngine:
+    """
+    Runs the pathfinding algorithms on a GridMap without drawing anything.
+    All per-tile state (visited, cost, parent) is kept in flat arrays indexed like the GridMap.
+    """
+    def __init__(self, grid: GridMap, start_pos: tuple[int, int] = None, end_pos: tuple[int, int] = None,
+                 on_visit: Optional[Callable[[tuple[int, int]], None]] = None, record_visits: bool = True) -> None:
+        """
+        :param grid: The grid to search
+        :param start_pos: Position of the start tile (defaults to the grid's start tile)
+        :param end_pos: Position of the end tile (defaults to the grid's end tile)
+        :param on_visit: Called with the position of each tile as it is visited (e.g. to animate the search)
+        :param record_visits: If the positions of visited tiles are kept in the result's visit_order
+        """
+        self.grid = grid
+        self.start = grid.start if start_pos is None else grid.index(start_pos)
+        self.end = grid.end if end_pos is None else grid.index(end_pos)
+        self.on_visit = on_visit
+        self.record_visits = record_visits
+
+    def _new_visit_order(self) -> Optional[list[tuple[int, int]]]:
+        """
+        Creates the list visited positions are recorded in
+        :return: An empty list, or None if visits are not being recorded
+        :rtype: Optional[list[tuple[int, int]]]
+        """
+        return [] if self.record_visits else None
+
+    def _visit(self, index: int, visit_order: Optional[list[tuple[int, int]]]) -> None:
+        """
+        Records that a tile has been visited and notifies the visit callback
+        :param index: Index of the tile being visited
+        :param visit_order: The list of visited positions to add to (None if not recording)
+        """
+        if visit_order is not None:
+            visit_order.append(self.grid.pos(index))
+        if self.on_visit is not None:
+            self.on_visit(self.grid.pos(index))
+
+    def _build_path(self, parents: array, end_index: int) -> list[tuple[int, int]]:
+        """
+        Follows a parent array back from the end tile to build the path
+        :param parents: Index of the tile each tile was reached from (-1 for the start tile)
+        :param end_index: Index of the end tile
+        :return: Positions on the path from the start tile to the end tile
+        :rtype: list[tuple[int, int]]
+        """
+        path = []
+        index = end_index
+        while index != -1:
+            path.append(self.grid.pos(index))
+            index = parents[index]
+        path.reverse()
+        return path
+
+    def _new_parents(self) -> array:
+        """
+        Creates the parent array for a search, every tile starts with no parent (-1)
+        :return: A new parent array
+        :rtype: array
+        """
+        return array("i", [-1]) * self.grid.size
+
+    def dfs(self, directions: tuple[tuple[int, int], ...] = None) -> SearchResult:
+        """
+        Runs a Depth-First Search from the start tile until the end tile is visited
+        Uses an explicit stack instead of recursion so it works on grids of any size,
+        visiting tiles in the same order as the recursive version.
+        :param directions: Offsets (row, col) to try neighbours in, defaults to the GridMap's order
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        start = self.start
+        end = self.end
+        visit_order = self._new_visit_order()
+        if not grid.connected(start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        visited = bytearray(grid.size)
+        parents = self._new_parents()
+
+        visited[start] = 1
+        expanded = 1
+        self._visit(start, visit_order)
+        if start == end:
+            return SearchResult(True, [grid.pos(start)], expanded, visit_order)
+
+        # Each entry is a tile and an iterator over the neighbours it still has to try
+        stack = [(start, iter(grid.neighbours(start, directions)))]
+        while stack:
+            index, neighbours = stack[-1]
+            for neighbour in neighbours:
+                if visited[neighbour]:
+                    continue
+                visited[neighbour] = 1
+                parents[neighbour] = index
+                expanded += 1
+                self._visit(neighbour, visit_order)
+                if neighbour == end:
+                    return SearchResult(True, self._build_path(parents, end), expanded, visit_order)
+                stack.append((neighbour, iter(grid.neighbours(neighbour, directions))))
+                break
+            else:
+                # All neighbours tried, backtrack
+                stack.pop()
+        return SearchResult(False, [], expanded, visit_order)
+
+    def bfs(self) -> SearchResult:
+        """
+        Runs a Breadth-First Search from the start tile until the end tile is visited
+        Visited tiles are kept in a bytearray and the frontier in a deque, so the search
+        is linear in the number of tiles explored.
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        start = self.start
+        end = self.end
+        visit_order = self._new_visit_order()
+        if not grid.connected(start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        visited = bytearray(grid.size)
+        parents = self._new_parents()
+
+        visited[start] = 1
+        expanded = 1
+        self._visit(start, visit_order)
+        if start == end:
+            return SearchResult(True, [grid.pos(start)], expanded, visit_order)
+
+        queue = deque([start])
+        while queue:
+            n = queue.popleft()
+            for neighbour in grid.neighbours(n):
+                if visited[neighbour]:
+                    continue
+                visited[neighbour] = 1
+                parents[neighbour] = n
+                expanded += 1
+                self._visit(neighbour, visit_order)
+                if neighbour == end:
+                    return SearchResult(True, self._build_path(parents, end), expanded, visit_order)
+                queue.append(neighbour)
+        return SearchResult(False, [], expanded, visit_order)
+
+    def dijkstra(self, stop_at_end: bool = False) -> SearchResult:
+        """
+        Runs Dijkstra's Algorithm from the start tile
+        Only tiles reachable from the start tile are settled, walls are never visited.
+        :param stop_at_end: If True the search stops as soon as the end tile is settled,
+            otherwise it finds the distance to every reachable tile (one-to-all)
+        :return: The result of the search, including the distances to every tile in one-to-all mode
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        end = self.end
+        visit_order = self._new_visit_order()
+        if stop_at_end and not grid.connected(self.start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        # Best-known cost to all nodes
+        shortest_path = array("i", [LARGE_VALUE]) * grid.size
+        parents = self._new_parents()
+        settled = bytearray(grid.size)
+        expanded = 0
+
+        nodes_to_visit = priorityqueue.PriorityQueue()
+        nodes_to_visit.enqueue(self.start, 0)
+        shortest_path[self.start] = 0
+
+        while not nodes_to_visit.empty():
+            current_node = nodes_to_visit.dequeue()
+            settled[current_node] = 1
+            expanded += 1
+            self._visit(current_node, visit_order)
+            if stop_at_end and current_node == end:
+                break
+
+            # All tile distances are worth 1 distance point, hence + 1
+            distance = shortest_path[current_node] + 1
+            for neighbour in grid.neighbours(current_node):
+                if settled[neighbour]:
+                    continue
+                if shortest_path[neighbour] == LARGE_VALUE:
+                    shortest_path[neighbour] = distance
+                    parents[neighbour] = current_node
+                    nodes_to_visit.enqueue(neighbour, distance)
+                elif distance < shortest_path[neighbour]:
+                    shortest_path[neighbour] = distance
+                    parents[neighbour] = current_node
+                    nodes_to_visit.decrease_key(neighbour, distance)
+
+        distances = None if stop_at_end else shortest_path
+        if not settled[end]:
+            return SearchResult(False, [], expanded, visit_order, distances)
+        return SearchResult(True, self._build_path(parents, end), expanded, visit_order, distances)
+
+    @staticmethod
+    def calculate_heuristic(pos_a: tuple[int, int], pos_b: tuple[int, int]) -> float:
+        """
+        Uses Pythagoras' theorem to calculate an estimate distance
+        Kept as the default because it will make sure the algorithm favours the correct direction more often,
+        the other heuristics are in the heuristics module.
+        :param pos_a: Position A (current node)
+        :param pos_b: Position B (next node)
+        :return: Estimated distance between the two nodes
+        :rtype: float
+        """
+        return heuristics.euclidean(pos_a, pos_b)
+
+    def a_star(self, landmarks: LandmarkIndex = None, heuristic: str = heuristics.DEFAULT_HEURISTIC,
+               diagonal: bool = False) -> SearchResult:
+        """
+        Runs A* Search to find the path between the start tile and the end tile
+        :param landmarks: Landmark index for the grid, if passed the heuristic is the larger of the
+            chosen heuristic and the landmark (ALT) lower bound
+        :param heuristic: Name of the heuristic to use, a key of heuristics.HEURISTICS
+        :param diagonal: If True diagonal moves (costing the square root of 2) are allowed as well,
+            the Manhattan heuristic can overestimate in this mode so the path may not be the shortest
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        if diagonal and landmarks is not None:
+            raise ValueError("Landmark distances are only valid without diagonal moves")
+        estimate = heuristics.get_heuristic(heuristic)
+        # g: Distance between current node and start node
+        # h: Heuristic (estimated distance from current to end node)
+        # f: Total cost of node (f = g + h)
+        grid = self.grid
+        end = self.end
+        end_pos = grid.pos(end)
+        landmark_target = landmarks.target(end) if landmarks is not None else None
+        visit_order = self._new_visit_order()
+        if not grid.connected(self.start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        # Best-known cost to all nodes, diagonal moves make the costs fractional
+        shortest_path = array("d" if diagonal else "i", [LARGE_VALUE]) * grid.size
+        parents = self._new_parents()
+        expanded = 0
+
+        nodes_to_visit = priorityqueue.PriorityQueue()
+        nodes_to_visit.enqueue(self.start, 0)
+        shortest_path[self.start] = 0
+
+        while not nodes_to_visit.empty():
+            current_node = nodes_to_visit.dequeue()
+            expanded += 1
+            self._visit(current_node, visit_order)
+            if current_node == end:
+                path_cost = shortest_path[end] if diagonal else None
+                return SearchResult(True, self._build_path(parents, end), expanded, visit_order,
+                                    path_cost=path_cost)
+
+            neighbours = grid.neighbours(current_node)
+            # Neighbours after this position are diagonal
+            diagonal_from = len(neighbours)
+            if diagonal:
+                neighbours += grid.diagonal_neighbours(current_node)
+            for i, neighbour in enumerate(neighbours):
+                g = shortest_path[current_node] + (1 if i < diagonal_from else heuristics.DIAGONAL_COST)
+                if g < shortest_path[neighbour]:
+                    shortest_path[neighbour] = g
+                    parents[neighbour] = current_node
+                    h = estimate(grid.pos(neighbour), end_pos)
+                    if landmark_target is not None:
+                        h = max(h, landmarks.heuristic(neighbour, landmark_target))
+                    f = g + h
+                    if neighbour in nodes_to_visit:
+                        nodes_to_visit.decrease_key(neighbour, f)
+                    else:
+                        nodes_to_visit.enqueue(neighbour, f)
+
+        return SearchResult(False, [], expanded, visit_order)
+
+    def hierarchical_a_star(self, clusters: ClusterGraph) -> SearchResult:
+        """
+        Runs Hierarchical Pathfinding A* (HPA*): searches the graph of cluster transitions first,
+        then finds the detailed path only inside the clusters on the way
+        :param clusters: Cluster graph built for the grid
+        :return: The result of the search, the path may be a little longer than the shortest path
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        visit_order = self._new_visit_order()
+        if not grid.connected(self.start, self.end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        path, expanded = clusters.find_path(self.start, self.end, lambda index: self._visit(index, visit_order))
+        return SearchResult(bool(path), [grid.pos(index) for index in path], expanded, visit_order)
+
+    def _build_joined_path(self, forward_parents: array, backward_parents: array,
+                           meet_forward: int, meet_backward: int) -> list[tuple[int, int]]:
+        """
+        Joins the paths of a bidirectional search where the two searches met
+        :param forward_parents: Parent array of the search from the start tile
+        :param backward_parents: Parent array of the search from the end tile
+        :param meet_forward: Tile reached by the forward search on the edge where the searches met
+        :param meet_backward: Tile reached by the backward search on the edge where the searches met
+        :return: Positions on the path from the start tile to the end tile
+        :rtype: list[tuple[int, int]]
+        """
+        path = self._build_path(forward_parents, meet_forward)
+        index = meet_backward
+        while index != -1:
+            path.append(self.grid.pos(index))
+            index = backward_parents[index]
+        return path
+
+    def bidirectional_bfs(self) -> SearchResult:
+        """
+        Runs a Breadth-First Search from the start tile and the end tile at the same time
+        The smaller frontier is expanded one whole level at a time. Because the two visited sets
+        are checked on every new tile, the first edge joining them is on a shortest path.
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        start = self.start
+        end = self.end
+        visit_order = self._new_visit_order()
+        if not grid.connected(start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+
+        self._visit(start, visit_order)
+        if start == end:
+            return SearchResult(True, [grid.pos(start)], 1, visit_order)
+        self._visit(end, visit_order)
+        expanded = 2
+
+        # Visited flags and parents for the searches from the start (forward) and end (backward)
+        forward_visited = bytearray(grid.size)
+        backward_visited = bytearray(grid.size)
+        forward_parents = self._new_parents()
+        backward_parents = self._new_parents()
+        forward_visited[start] = 1
+        backward_visited[end] = 1
+        forward_frontier = [start]
+        backward_frontier = [end]
+
+        while forward_frontier and backward_frontier:
+            forward = len(forward_frontier) <= len(backward_frontier)
+            if forward:
+                frontier, visited, parents, other_visited = \
+                    forward_frontier, forward_visited, forward_parents, backward_visited
+            else:
+                frontier, visited, parents, other_visited = \
+                    backward_frontier, backward_visited, backward_parents, forward_visited
+
+            next_frontier = []
+            for n in frontier:
+                for neighbour in grid.neighbours(n):
+                    if other_visited[neighbour]:
+                        if forward:
+                            path = self._build_joined_path(forward_parents, backward_parents, n, neighbour)
+                        else:
+                            path = self._build_joined_path(forward_parents, backward_parents, neighbour, n)
+                        return SearchResult(True, path, expanded, visit_order)
+                    if visited[neighbour]:
+                        continue
+                    visited[neighbour] = 1
+                    parents[neighbour] = n
+                    expanded += 1
+                    self._visit(neighbour, visit_order)
+                    next_frontier.append(neighbour)
+
+            if forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return SearchResult(False, [], expanded, visit_order)
+
+    def bidirectional_a_star(self) -> SearchResult:
+        """
+        Runs A* Search from the start tile towards the end tile and from the end tile towards the start tile
+        Both searches use the average of the two heuristics, p = (h(tile, end) - h(tile, start)) / 2, forwards
+        and -p backwards, so they run Dijkstra's Algorithm on the same reduced graph. The search with the
+        smaller queue is expanded each step, the best path through an edge joining the searches is kept,
+        and the search stops once the smallest keys of the two queues add up to at least its cost.
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        start = self.start
+        end = self.end
+        visit_order = self._new_visit_order()
+        if not grid.connected(start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        if start == end:
+            self._visit(start, visit_order)
+            return SearchResult(True, [grid.pos(start)], 1, visit_order)
+
+        end_pos = grid.pos(end)
+        start_pos = grid.pos(start)
+
+        def potential(index: int) -> float:
+            pos = grid.pos(index)
+            return (self.calculate_heuristic(pos, end_pos) - self.calculate_heuristic(pos, start_pos)) / 2
+
+        # Index 0 is the search from the start tile, index 1 the search from the end tile
+        signs = (1, -1)
+        shortest_paths = (array("i", [LARGE_VALUE]) * grid.size, array("i", [LARGE_VALUE]) * grid.size)
+        parents = (self._new_parents(), self._new_parents())
+        queues = (priorityqueue.PriorityQueue(), priorityqueue.PriorityQueue())
+        shortest_paths[0][start] = 0
+        shortest_paths[1][end] = 0
+        queues[0].enqueue(start, potential(start))
+        queues[1].enqueue(end, -potential(end))
+        expanded = 0
+
+        # Cost of the best path found so far and the edge (forward tile, backward tile) it goes through
+        best_cost = LARGE_VALUE
+        best_meeting = None
+
+        while not queues[0].empty() and not queues[1].empty():
+            if queues[0].peek_priority() + queues[1].peek_priority() >= best_cost:
+                break
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            shortest_path = shortest_paths[side]
+            other_shortest_path = shortest_paths[1 - side]
+            sign = signs[side]
+            nodes_to_visit = queues[side]
+
+            current_node = nodes_to_visit.dequeue()
+            expanded += 1
+            self._visit(current_node, visit_order)
+
+            g = shortest_path[current_node] + 1
+            for neighbour in grid.neighbours(current_node):
+                if other_shortest_path[neighbour] != LARGE_VALUE and g + other_shortest_path[neighbour] < best_cost:
+                    best_cost = g + other_shortest_path[neighbour]
+                    best_meeting = (current_node, neighbour) if side == 0 else (neighbour, current_node)
+                if g < shortest_path[neighbour]:
+                    shortest_path[neighbour] = g
+                    parents[side][neighbour] = current_node
+                    f = g + sign * potential(neighbour)
+                    if neighbour in nodes_to_visit:
+                        nodes_to_visit.decrease_key(neighbour, f)
+                    else:
+                        nodes_to_visit.enqueue(neighbour, f)
+
+        if best_meeting is None:
+            return SearchResult(False, [], expanded, visit_order)
+        meet_forward, meet_backward = best_meeting
+        path = self._build_joined_path(parents[0], parents[1], meet_forward, meet_backward)
+        return SearchResult(True, path, expanded, visit_order)
+
+    def _walkable(self, row: int, col: int) -> bool:
+        """
+        Returns if the position is on the grid and not a wall
+        :param row: Row of the tile
+        :param col: Column of the tile
+        :return: True if the tile can be moved onto
+        :rtype: bool
+        """
+        grid = self.grid
+        return 0 <= row < grid.rows and 0 <= col < grid.cols and not grid.walls[row * grid.cols + col]
+
+    def _jump(self, row: int, col: int, d_row: int, d_col: int) -> int:
+        """
+        Moves in a straight line from a tile until a jump point is found
+        A jump point is the end tile, or a tile with a forced neighbour (a tile that can only be reached
+        optimally through it because of a wall). Moving along a row also stops at any tile from
+        which a jump up or down its column finds a jump point.
+        :param row: Row of the first tile moved onto
+        :param col: Column of the first tile moved onto
+        :param d_row: Row direction of the move (-1, 0 or 1)
+        :param d_col: Column direction of the move (-1, 0 or 1)
+        :return: Index of the jump point, or -1 if a wall or the edge of the grid is hit first
+        :rtype: int
+        """
+        walkable = self._walkable
+        cols = self.grid.cols
+        while walkable(row, col):
+            index = row * cols + col
+            if index == self.end:
+                return index
+            if d_row != 0:
+                if (walkable(row, col - 1) and not walkable(row - d_row, col - 1)) or \
+                        (walkable(row, col + 1) and not walkable(row - d_row, col + 1)):
+                    return index
+            else:
+                if (walkable(row - 1, col) and not walkable(row - 1, col - d_col)) or \
+                        (walkable(row + 1, col) and not walkable(row + 1, col - d_col)):
+                    return index
+                if self._jump(row + 1, col, 1, 0) != -1 or self._jump(row - 1, col, -1, 0) != -1:
+                    return index
+            row += d_row
+            col += d_col
+        return -1
+
+    def jump_point_search(self) -> SearchResult:
+        """
+        Runs Jump Point Search (A* Search over jump points) to find the path between the start and end tile
+        Every move costs the same, so instead of adding each neighbour to the queue the search
+        jumps in straight lines and only queues tiles where the path could need to turn.
+        Uses the Manhattan distance as the heuristic, which is exact on an open 4-connected grid.
+        :return: The result of the search, expanded counts the jump points taken off the queue
+        :rtype: SearchResult
+        """
+        grid = self.grid
+        cols = grid.cols
+        end = self.end
+        end_row, end_col = grid.pos(end)
+        visit_order = self._new_visit_order()
+        if not grid.connected(self.start, end):
+            # The end tile is in a different region, no need to search
+            return SearchResult(False, [], 0, visit_order)
+        # Best-known cost to all jump points
+        shortest_path = array("i", [LARGE_VALUE]) * grid.size
+        parents = self._new_parents()
+        closed = bytearray(grid.size)
+        expanded = 0
+
+        nodes_to_visit = priorityqueue.PriorityQueue()
+        nodes_to_visit.enqueue(self.start, 0)
+        shortest_path[self.start] = 0
+
+        while not nodes_to_visit.empty():
+            current_node = nodes_to_visit.dequeue()
+            closed[current_node] = 1
+            expanded += 1
+            self._visit(current_node, visit_order)
+            if current_node == end:
+                return SearchResult(True, self._build_jump_path(parents, end), expanded, visit_order)
+
+            row, col = divmod(current_node, cols)
+            parent = parents[current_node]
+            if parent == -1:
+                directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+            else:
+                parent_row, parent_col = divmod(parent, cols)
+                d_row = (row > parent_row) - (row < parent_row)
+                d_col = (col > parent_col) - (col < parent_col)
+                if d_row != 0:
+                    directions = ((d_row, 0), (0, 1), (0, -1))
+                else:
+                    directions = ((0, d_col), (1, 0), (-1, 0))
+
+            for d_row, d_col in directions:
+                jump_point = self._jump(row + d_row, col + d_col, d_row, d_col)
+                if jump_point == -1 or closed[jump_point]:
+                    continue
+                jump_row, jump_col = divmod(jump_point, cols)
+                g = shortest_path[current_node] + abs(jump_row - row) + abs(jump_col - col)
+                if g < shortest_path[jump_point]:
+                    shortest_path[jump_point] = g
+                    parents[jump_point] = current_node
+                    f = g + abs(jump_row - end_row) + abs(jump_col - end_col)
+                    if jump_point in nodes_to_visit:
+                        nodes_to_visit.decrease_key(jump_point, f)
+                    else:
+                        nodes_to_visit.enqueue(jump_point, f)
+
+        return SearchResult(False, [], expanded, visit_order)
+
+    def _build_jump_path(self, parents: array, end_index: int) -> list[tuple[int, int]]:
+        """
+        Builds the full path from the jump points, filling in the straight lines between them
+        :param parents: Index of the jump point each jump point was reached from (-1 for the start tile)
+        :param end_index: Index of the end tile
+        :return: Positions on the path from the start tile to the end tile
+        :rtype: list[tuple[int, int]]
+        """
+        jump_points = self._build_path(parents, end_index)
+        path = [jump_points[0]]
+        for row, col in jump_points[1:]:
+            last_row, last_col = path[-1]
+            d_row = (row > last_row) - (row < last_row)
+            d_col = (col > last_col) - (col < last_col)
+            while (last_row, last_col) != (row, col):
+                last_row += d_row
+                last_col += d_col
+                path.append((last_row, last_col))
+        return path
@@ -1,210 +1,450 @@
 from __future__ import annotations
 
-import math
-import priorityqueue
-
-from simplesearches import ShowPathfindingGUI, PathfindingTile
-
-# Large value (like an infinity value)
-LARGE_VALUE = 1000000
+import random
+import time
+
+import heuristics
+from dstarlite import DStarLite
+from flowfield import FlowField
+from hierarchy import ClusterGraph
+from landmarks import LandmarkIndex
+from pathengine import SearchResult
+from simplesearches import ShowPathfindingGUI, VISITED_TILE
+
+# Width and height of the clusters used by HPA* when no size is given
+CLUSTER_SIZE = 8
+# Number of agents routed with the flow field
+FLOW_AGENTS = 100
+# Number of times D* Lite changes the walls and repairs its path, and the walls added and removed each time
+REPLAN_ROUNDS = 5
+REPLAN_EDITS = 3
 
 
 class DijkstraAlgoSearch(ShowPathfindingGUI):
     """
     Runs a visualisation of Dijkstra's Algorithm
     """
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None,
+                 stop_at_end: bool = False) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        :param stop_at_end: If True stops once the end tile is settled instead of visiting every reachable tile
         """
-        super().__init__(width, height, "Dijkstra's Algorithm", frame_time=0)
+        super().__init__(width, height, "Dijkstra's Algorithm", frame_time=0, headless=headless,
+                         map_file=map_file)
+        self.stop_at_end = stop_at_end
         self.draw()
-        self.graph_flat = DijkstraAlgoSearch.flatten_tiles_map(self.map_tiles)
 
-    def __dijkstra_algorithm(self, start_node: PathfindingTile) \
-            -> tuple[dict[PathfindingTile, PathfindingTile], dict[PathfindingTile, int]]:
+    def dijkstra_algorithm(self) -> SearchResult:
         """
-        Runs dijkstra's algorithm on the graph/grid of tiles
-        :param start_node: The node act as the start node
-        :return: Dictionary for the previous nodes and dictionary for shortest path values
-        :rtype: tuple[dict[PathfindingTile, PathfindingTile], dict[PathfindingTile, int]]
+        Runs dijkstra's algorithm on the graph/grid of tiles from the start tile
+        :return: The result of the search, including the shortest path values to every tile
+            unless stop_at_end is set
+        :rtype: SearchResult
         """
-        # List of all nodes
-        unvisited_nodes = self.graph_flat.copy()
-        # Best-known cost to all nodes
-        shortest_path = {}
+        return self._create_engine().dijkstra(self.stop_at_end)
 
-        prev_nodes = {}
-
-        for node in unvisited_nodes:
-            shortest_path[node] = LARGE_VALUE
-        shortest_path[start_node] = 0
+    def solve(self) -> None:
+        """
+        Runs Dijkstra's Algorithm and displays the results to the user
+        """
+        # Solve
+        self.result = self.dijkstra_algorithm()
+        self._frame_time = 0.05
+        # Display path
+        self.display_path(self.result.path)
+        self.complete = True
+        self.print_result()
 
-        while unvisited_nodes:
-            current_node = None
 
-            for node in unvisited_nodes:
-                if not current_node:
-                    current_node = node
-                elif shortest_path[node] < shortest_path[current_node]:
-                    current_node = node
+class AStarSearch(ShowPathfindingGUI):
+    """
+    Runs the A* Search visualiser
+    """
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None,
+                 landmark_count: int = 0, landmark_selection: str = "farthest",
+                 heuristic: str = heuristics.DEFAULT_HEURISTIC, diagonal: bool = False) -> None:
+        """
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        :param landmark_count: Number of landmarks to precompute for the ALT heuristic (0 to not use landmarks)
+        :param landmark_selection: How the landmarks are picked, see LandmarkIndex
+        :param heuristic: Name of the heuristic to use, a key of heuristics.HEURISTICS
+        :param diagonal: If True diagonal moves are allowed (cannot be used with landmarks)
+        """
+        super().__init__(width, height, "A* Search Algorithm", frame_time=0.1, headless=headless,
+                         map_file=map_file)
+        # Checking the name now instead of after the map has been drawn
+        heuristics.get_heuristic(heuristic)
+        self.heuristic = heuristic
+        self.diagonal = diagonal
+        self.landmarks = None
+        if landmark_count > 0:
+            self.landmarks = LandmarkIndex(self.grid, landmark_count, landmark_selection)
+        self.draw()
 
-            # Skipping all wall nodes
-            if current_node.is_wall():
-                unvisited_nodes.remove(current_node)
-                continue
+    def a_star(self) -> SearchResult:
+        """
+        Runs A* Search to find path between the start tile and the end tile
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        return self._create_engine().a_star(self.landmarks, self.heuristic, self.diagonal)
 
-            neighbours = current_node.neighbours
-            for neighbour in neighbours:
-                # All tile distances are worth 1 distance point, hence + 1
-                distance = shortest_path[current_node] + 1
-                if distance < shortest_path[neighbour]:
-                    shortest_path[neighbour] = distance
-                    prev_nodes[neighbour] = current_node
+    def solve(self) -> None:
+        """
+        Runs the solver for the A* Search
+        """
+        # Solving
+        self.result = self.a_star()
+        self._frame_time = 0.05
+        # Displaying Path
+        self.display_path(self.result.path)
+        self.complete = True
+        self.print_result()
 
-            current_node.visit()
-            self.draw()
-            unvisited_nodes.remove(current_node)
-        return prev_nodes, shortest_path
+    def print_result(self) -> None:
+        """
+        Prints the result of the search, how much the landmarks helped if they were used,
+        and how every heuristic does on the same map
+        """
+        super().print_result()
+        if not self.headless:
+            return
+        if self.landmarks is not None:
+            without_landmarks = self._create_engine().a_star(heuristic=self.heuristic)
+            print(f"\tLandmarks: {self.landmarks.report()}")
+            print(f"\tNodes expanded without landmarks: {without_landmarks.expanded}")
+
+        stats = heuristics.HeuristicStats()
+        for name in heuristics.HEURISTICS:
+            start_time = time.perf_counter()
+            result = self._create_engine().a_star(heuristic=name, diagonal=self.diagonal)
+            stats.add(name, result.expanded, time.perf_counter() - start_time)
+        stats.print()
+
+
+class HierarchicalAStarSearch(ShowPathfindingGUI):
+    """
+    Runs the Hierarchical Pathfinding A* (HPA*) visualiser
+    """
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None,
+                 cluster_size: int = CLUSTER_SIZE) -> None:
+        """
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        :param cluster_size: Width and height of each cluster in tiles
+        """
+        super().__init__(width, height, "Hierarchical A* Search Algorithm", frame_time=0.1, headless=headless,
+                         map_file=map_file)
+        self.clusters = ClusterGraph(self.grid, cluster_size)
+        self.query_time = 0.0
+        self.draw()
 
-    def display_path_from_prev_nodes(self, prev_nodes: dict[PathfindingTile, PathfindingTile]) -> None:
+    def hierarchical_a_star(self) -> SearchResult:
         """
-        Displays the path using the prev_nodes that were found using Dijkstra's Algorithm
-        :param prev_nodes: Dictionary linking nodes to previous nodes representing paths to the starting node
+        Runs HPA* to find a path between the start tile and the end tile
+        :return: The result of the search
+        :rtype: SearchResult
         """
-        x, y = self._start_pos
-        start_node = self.map_tiles[x][y]
-        x, y = self._end_pos
-        end_node = self.map_tiles[x][y]
+        return self._create_engine().hierarchical_a_star(self.clusters)
 
-        current_node = end_node
+    def solve(self) -> None:
+        """
+        Runs the solver for the HPA* Search
+        """
+        # Solving
+        start_time = time.perf_counter()
+        self.result = self.hierarchical_a_star()
+        self.query_time = time.perf_counter() - start_time
+        self._frame_time = 0.05
+        # Displaying Path
+        self.display_path(self.result.path)
+        self.complete = True
+        self.print_result()
 
-        start_node.color = (7, 138, 0)
+    def print_result(self) -> None:
+        """
+        Prints the result of the search, the preprocessing and query times, and how much
+        longer the path is than the shortest path
+        """
+        super().print_result()
+        if not self.headless:
+            return
+        print(f"\tClusters: {self.clusters.report()}")
+        print(f"\tQuery time: {self.query_time:.4f}s")
+        if self.result.found:
+            shortest = self._create_engine().a_star(heuristic="manhattan")
+            gap = (self.result.cost - shortest.cost) / max(shortest.cost, 1) * 100
+            print(f"\tShortest path length: {shortest.cost}, optimality gap: {gap:.1f}%, "
+                  f"nodes expanded by A*: {shortest.expanded}")
+
+
+class JumpPointSearch(ShowPathfindingGUI):
+    """
+    Runs the Jump Point Search visualiser
+    """
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None) -> None:
+        """
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        """
+        super().__init__(width, height, "Jump Point Search", frame_time=0.1, headless=headless,
+                         map_file=map_file)
+        self.draw()
 
-        while current_node != start_node:
-            # GREEN
-            current_node.color = (7, 138, 0)
-            current_node = prev_nodes[current_node]
-            self.draw()
+    def jump_point_search(self) -> SearchResult:
+        """
+        Runs Jump Point Search to find path between the start tile and the end tile
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        return self._create_engine().jump_point_search()
 
     def solve(self) -> None:
         """
-        Runs Dijkstra's Algorithm and displays the results to the user
+        Runs the solver for the Jump Point Search
         """
-        x, y = self._start_pos
-        start_node = self.map_tiles[x][y]
-        # Solve
-        prev_nodes, _ = self.__dijkstra_algorithm(start_node)
+        # Solving
+        self.result = self.jump_point_search()
         self._frame_time = 0.05
-        # Display path
-        self.display_path_from_prev_nodes(prev_nodes)
+        # Displaying Path
+        self.display_path(self.result.path)
         self.complete = True
+        self.print_result()
 
 
-class AStarSearch(ShowPathfindingGUI):
+class BidirectionalAStarSearch(ShowPathfindingGUI):
     """
-    Runs the A* Search visualiser
+    Runs the bidirectional A* Search visualiser
     """
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
         """
-        super().__init__(width, height, "A* Search Algorithm", frame_time=0.1)
+        super().__init__(width, height, "Bidirectional A* Search Algorithm", frame_time=0.1, headless=headless,
+                         map_file=map_file)
         self.draw()
 
-    @staticmethod
-    def __calculate_heuristic(node_a: PathfindingTile, node_b: PathfindingTile) -> float:
-        """
-        Uses Pythagoras' theorem to calculate an estimate distance
-        Used instead of Manhattan distance (which would be a better estimate) because
-        it will make sure the algorithm favours the correct direction more often.
-        :param node_a: Node A (current node)
-        :param node_b: Node B (next node)
-        :return: Estimated distance between the two nodes
-        :rtype: float
-        """
-        ax, ay = node_a.get_pos()
-        bx, by = node_b.get_pos()
-        # Pythagoras
-        return math.sqrt((ax - bx) ** 2 + abs(ay - by) ** 2)
-
-    def __a_star(self, start_node: PathfindingTile, end_node: PathfindingTile) \
-            -> tuple[dict[PathfindingTile, PathfindingTile], dict[PathfindingTile, int]]:
-        """
-        Runs A* Search to find path between start_node and end_node.
-        :param start_node: The start node for the algorithm
-        :param end_node: The target node for the algorithm
-        :return: Dictionary for the previous nodes and dictionary for shortest path values
-        :rtype: tuple[dict[PathfindingTile, PathfindingTile], dict[PathfindingTile, int]]
-        """
-        # g: Distance between current node and start node
-        # h: Heuristic (estimated distance from current to end node)
-        # f: Total cost of node (f = g + h)
-
-        # List of all nodes
-        # unvisited_nodes = self.graph_flat.copy()
-
-        nodes_to_visit = priorityqueue.PriorityQueue()
-        nodes_to_visit.enqueue(start_node, 0)
-
-        # Best-known cost to all nodes
-        shortest_path = {}
-        prev_nodes = {}
-
-        shortest_path[start_node] = 0
-        prev_nodes[start_node] = None
-
-        while not nodes_to_visit.empty():
-            current_node = nodes_to_visit.dequeue()
-            current_node.visit()
-            self.draw()
-            if current_node == end_node:
-                break
+    def bidirectional_a_star(self) -> SearchResult:
+        """
+        Runs A* Search from the start tile and the end tile at the same time
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        return self._create_engine().bidirectional_a_star()
 
-            for neighbour in current_node.neighbours:
-                g = shortest_path[current_node] + 1
-                if neighbour not in shortest_path or g < shortest_path[neighbour]:
-                    shortest_path[neighbour] = g
-                    f = g + AStarSearch.__calculate_heuristic(neighbour, end_node)
-                    nodes_to_visit.enqueue(neighbour, f)
-                    prev_nodes[neighbour] = current_node
+    def solve(self) -> None:
+        """
+        Runs the solver for the bidirectional A* Search
+        """
+        # Solving
+        self.result = self.bidirectional_a_star()
+        self._frame_time = 0.05
+        # Displaying Path
+        self.display_path(self.result.path)
+        self.complete = True
+        self.print_result()
 
-        return prev_nodes, shortest_path
 
-    def display_path_from_prev_nodes(self, prev_nodes: dict[PathfindingTile, PathfindingTile]) -> None:
+class DStarLiteSearch(ShowPathfindingGUI):
+    """
+    Runs the D* Lite visualiser
+    Plans a path, then keeps adding walls on the path (and removing others) and repairs it.
+    """
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None,
+                 rounds: int = REPLAN_ROUNDS, edits: int = REPLAN_EDITS, seed: int = None) -> None:
         """
-        COPIED FROM DIJKSTRA'S - THIS CAN BE DONE BETTER XD
-        Displays the path using the prev_nodes that were found using A* Search
-        :param prev_nodes: Dictionary linking nodes to previous nodes representing paths to the starting node
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        :param rounds: Number of times the walls are changed and the path repaired
+        :param edits: Number of walls added (and removed) each round
+        :param seed: Seed for picking the walls to change
         """
-        x, y = self._start_pos
-        start_node = self.map_tiles[x][y]
-        x, y = self._end_pos
-        end_node = self.map_tiles[x][y]
+        super().__init__(width, height, "D* Lite", frame_time=0.1, headless=headless,
+                         map_file=map_file)
+        self.rounds = rounds
+        self.edits = edits
+        self.__rng = random.Random(seed)
+        # Indexes of every wall, built once and kept up to date so a round never scans the whole map
+        self.__walls = []
+        self.planner = None
+        self.draw()
 
-        current_node = end_node
+    def __random_edits(self) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+        """
+        Picks walls to add on the current path and existing walls to remove
+        :return: Positions of the walls to add and of the walls to remove
+        :rtype: tuple[list[tuple[int, int]], list[tuple[int, int]]]
+        """
+        # Never the start or end tile
+        on_path = self.result.path[1:-1]
+        added = self.__rng.sample(on_path, min(self.edits, len(on_path)))
+        walls = self.__walls
+        removed = []
+        for _ in range(min(self.edits, len(walls))):
+            # Swapping the picked wall to the end so it can be taken off the list without moving the others
+            i = self.__rng.randrange(len(walls))
+            walls[i], walls[-1] = walls[-1], walls[i]
+            removed.append(self.grid.pos(walls.pop()))
+        walls.extend(self.grid.index(pos) for pos in added)
+        return added, removed
+
+    def __show_edits(self, old_path: list[tuple[int, int]], added: list[tuple[int, int]],
+                     removed: list[tuple[int, int]]) -> None:
+        """
+        Updates the tiles after the walls changed, and clears the path that is no longer used
+        :param old_path: The path before the walls changed
+        :param added: Positions of the walls that were added
+        :param removed: Positions of the walls that were removed
+        """
+        if self.headless:
+            return
+        for x, y in old_path:
+            self.map_tiles[x][y].color = VISITED_TILE
+            self._dirty_tiles.add((x, y))
+        for x, y in added:
+            self.map_tiles[x][y].set_wall()
+            self._dirty_tiles.add((x, y))
+        for x, y in removed:
+            self.map_tiles[x][y].clear_wall()
+            self._dirty_tiles.add((x, y))
+        self.draw(force=True)
 
-        start_node.color = (7, 138, 0)
+    def solve(self) -> None:
+        """
+        Plans the first path, then changes the walls and repairs the path each round
+        """
+        on_visit = None if self.headless else self._visit_tile
+        self.planner = DStarLite(self.grid, on_visit=on_visit)
+        self.__walls = [index for index in range(self.grid.size) if self.grid.walls[index]]
+        self.result = self.planner.plan()
+        self._frame_time = 0.05
+        self.display_path(self.result.path)
+        self.print_result()
+
+        for round_number in range(1, self.rounds + 1):
+            if not self.result.found:
+                break
+            old_path = self.result.path
+            added, removed = self.__random_edits()
+            self.result = self.planner.update_walls(added, removed)
+            self.__show_edits(old_path, added, removed)
+            self.display_path(self.result.path)
+            length = self.result.cost if self.result.found else "no path"
+            print(f"\tRound {round_number}: {len(added)} walls added, {len(removed)} removed, "
+                  f"{self.result.expanded} nodes re-expanded, path length: {length}")
+        self.complete = True
 
-        while current_node != start_node:
-            # GREEN
-            current_node.color = (7, 138, 0)
-            current_node = prev_nodes[current_node]
-            self.draw()
+
+class FlowFieldSearch(ShowPathfindingGUI):
+    """
+    Runs the flow field visualiser
+    Builds one flow field back from the end tile (and any extra goals), then routes many agents with it.
+    """
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None,
+                 goals: int = 1, agents: int = FLOW_AGENTS, seed: int = None) -> None:
+        """
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        :param goals: Number of goal tiles, the end tile and goals - 1 random tiles
+        :param agents: Number of agents on random tiles routed to their nearest goal
+        :param seed: Seed for placing the extra goals and the agents
+        """
+        super().__init__(width, height, "Flow Field", frame_time=0, headless=headless,
+                         map_file=map_file)
+        self.agents = agents
+        self.__rng = random.Random(seed)
+        self.goals = [self.grid.end]
+        while len(self.goals) < min(goals, self.grid.size - self.grid.walls.count(1) - 1):
+            goal = self.__random_open_tile()
+            if goal not in self.goals and goal != self.grid.start:
+                self.goals.append(goal)
+                if self.map_tiles:
+                    x, y = self.grid.pos(goal)
+                    self.map_tiles[x][y].set_end()
+        self.field = None
+        self.agent_paths = []
+        self.route_time = 0.0
+        self.draw()
+
+    def __random_open_tile(self) -> int:
+        """
+        Picks a random tile that is not a wall
+        :return: Index of the tile
+        :rtype: int
+        """
+        while True:
+            index = self.__rng.randrange(self.grid.size)
+            if not self.grid.walls[index]:
+                return index
+
+    def flow_field(self) -> FlowField:
+        """
+        Builds the flow field from all goal tiles
+        :return: The flow field
+        :rtype: FlowField
+        """
+        on_visit = None if self.headless else self._visit_tile
+        return FlowField(self.grid, self.goals, on_visit)
 
     def solve(self) -> None:
         """
-        Runs the solver for the A* Search
+        Builds the flow field, then routes every agent and shows the path from the start tile
         """
-        x, y = self._start_pos
-        start_node = self.map_tiles[x][y]
-        x, y = self._end_pos
-        end_node = self.map_tiles[x][y]
         # Solving
-        prev_nodes, _ = self.__a_star(start_node, end_node)
+        self.field = self.flow_field()
+        path = self.field.path_from(self._start_pos)
+        self.result = SearchResult(bool(path), path, self.field.expanded)
+
+        # Routing: no more searching, each agent just follows the directions
+        starts = [self.grid.pos(self.__random_open_tile()) for _ in range(self.agents)]
+        start_time = time.perf_counter()
+        self.agent_paths = [self.field.path_from(pos) for pos in starts]
+        self.route_time = time.perf_counter() - start_time
+
         self._frame_time = 0.05
         # Displaying Path
-        self.display_path_from_prev_nodes(prev_nodes)
+        self.display_path(self.result.path)
         self.complete = True
+        self.print_result()
+
+    def print_result(self) -> None:
+        """
+        Prints the result of the search, how long routing the agents took, and (with one goal)
+        how long running A* Search for every agent would have taken
+        """
+        super().print_result()
+        if not self.headless:
+            return
+        print(f"\tFlow field: {self.field.report()}")
+        routed = [path for path in self.agent_paths if path]
+        average_length = sum(len(path) - 1 for path in routed) / len(routed) if routed else 0
+        print(f"\tRouted {len(routed)}/{len(self.agent_paths)} agents in {self.route_time * 1000:.3f}ms, "
+              f"average path length: {average_length:.1f}")
+        if len(self.goals) > 1:
+            return
+
+        expanded = 0
+        start_time = time.perf_counter()
+        for path in self.agent_paths:
+            if path:
+                expanded += self._create_engine(path[0]).a_star(heuristic="manhattan").expanded
+        print(f"\tA* Search for each routed agent instead: {(time.perf_counter() - start_time) * 1000:.3f}ms, "
+              f"{expanded} nodes expanded")
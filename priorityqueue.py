@@ -5,6 +5,8 @@ class PriorityQueue:
     """
     Priority Queue class
     Elements of the queue are given a priority with which they are served.
+    Implemented as an indexed binary heap, so each item is stored at most once and
+    its priority can be changed in place (decrease-key) instead of adding duplicates.
     """
     def __init__(self, low_priority_first: bool = True) -> None:
         """
@@ -12,7 +14,11 @@ class PriorityQueue:
         :param low_priority_first: If low priority is served first
         """
         self.__low_priority_first = low_priority_first
+        # Heap of [key, insertion order, item] entries, the key is the priority (negated if high first)
         self.elements = []
+        # Item -> index of its entry in the heap
+        self.__positions = {}
+        self.__counter = 0
 
     def empty(self) -> bool:
         """
@@ -22,22 +28,183 @@ class PriorityQueue:
         """
         return not self.elements
 
+    def __len__(self) -> int:
+        """
+        Number of items in the queue
+        :return: The number of items in the queue
+        :rtype: int
+        """
+        return len(self.elements)
+
+    def __contains__(self, item) -> bool:
+        """
+        Returns if the item is currently in the queue
+        :param item: The item to look for
+        :return: True if the item is in the queue
+        :rtype: bool
+        """
+        return item in self.__positions
+
+    def __key(self, priority: float) -> float:
+        """
+        Converts a priority into the key used for ordering the heap
+        :param priority: The priority of an item
+        :return: The heap key (smallest key is served first)
+        :rtype: float
+        """
+        return priority if self.__low_priority_first else -priority
+
     def enqueue(self, item, priority: float) -> PriorityQueue:
         """
         Enqueues (adds to queue) the item with its priority
+        If the item is already in the queue its priority is updated instead.
         :param item: The item to be added to the queue
         :param priority: The priority of the item
         :return: This priority queue
         :rtype: PriorityQueue
         """
-        self.elements.append((item, priority))
+        if item in self.__positions:
+            return self.update(item, priority)
+
+        self.elements.append([self.__key(priority), self.__counter, item])
+        self.__counter += 1
+        index = len(self.elements) - 1
+        self.__positions[item] = index
+        self.__sift_up(index)
+        return self
+
+    def decrease_key(self, item, priority: float) -> PriorityQueue:
+        """
+        Moves an item already in the queue forward by giving it a better priority
+        :param item: The item in the queue
+        :param priority: The new priority of the item (served no later than the old one)
+        :return: This priority queue
+        :rtype: PriorityQueue
+        """
+        index = self.__positions[item]
+        key = self.__key(priority)
+        if key > self.elements[index][0]:
+            raise ValueError("New priority would move the item further back in the queue")
+        self.elements[index][0] = key
+        self.__sift_up(index)
         return self
 
+    def update(self, item, priority: float) -> PriorityQueue:
+        """
+        Changes the priority of an item already in the queue, in either direction
+        :param item: The item in the queue
+        :param priority: The new priority of the item
+        :return: This priority queue
+        :rtype: PriorityQueue
+        """
+        index = self.__positions[item]
+        self.elements[index][0] = self.__key(priority)
+        self.__sift_down(self.__sift_up(index))
+        return self
+
+    def peek(self):
+        """
+        Returns the next item in the queue without removing it
+        :return: The next item in the queue
+        """
+        if not self.elements:
+            raise IndexError("peek from an empty priority queue")
+        return self.elements[0][2]
+
+    def peek_priority(self) -> float:
+        """
+        Returns the priority of the next item in the queue without removing it
+        :return: The priority of the next item in the queue
+        :rtype: float
+        """
+        if not self.elements:
+            raise IndexError("peek from an empty priority queue")
+        key = self.elements[0][0]
+        return key if self.__low_priority_first else -key
+
     def dequeue(self):
         """
         Returns the next item in the queue based on the priority
+        Items with equal priority are served in the order they were added.
         :return: The next item in the queue
         """
-        # I know this isn't the best implementation
-        self.elements = sorted(self.elements, key=lambda x: x[1], reverse=not self.__low_priority_first)
-        return self.elements.pop(0)[0]
+        if not self.elements:
+            raise IndexError("dequeue from an empty priority queue")
+        last = self.elements.pop()
+        if not self.elements:
+            del self.__positions[last[2]]
+            return last[2]
+
+        first = self.elements[0]
+        self.elements[0] = last
+        self.__positions[last[2]] = 0
+        del self.__positions[first[2]]
+        self.__sift_down(0)
+        return first[2]
+
+    def remove(self, item) -> PriorityQueue:
+        """
+        Removes an item from anywhere in the queue
+        :param item: The item in the queue
+        :return: This priority queue
+        :rtype: PriorityQueue
+        """
+        index = self.__positions.pop(item)
+        last = self.elements.pop()
+        if index < len(self.elements):
+            # Moving the last entry into the gap, then back into heap order
+            self.elements[index] = last
+            self.__positions[last[2]] = index
+            self.__sift_down(self.__sift_up(index))
+        return self
+
+    def __sift_up(self, index: int) -> int:
+        """
+        Moves the entry at index up the heap until its parent is served before it
+        :param index: The index of the entry being moved
+        :return: The final index of the entry
+        :rtype: int
+        """
+        elements = self.elements
+        positions = self.__positions
+        entry = elements[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_entry = elements[parent]
+            if entry < parent_entry:
+                elements[index] = parent_entry
+                positions[parent_entry[2]] = index
+                index = parent
+                continue
+            break
+        elements[index] = entry
+        positions[entry[2]] = index
+        return index
+
+    def __sift_down(self, index: int) -> int:
+        """
+        Moves the entry at index down the heap until both children are served after it
+        :param index: The index of the entry being moved
+        :return: The final index of the entry
+        :rtype: int
+        """
+        elements = self.elements
+        positions = self.__positions
+        size = len(elements)
+        entry = elements[index]
+        child = 2 * index + 1
+        while child < size:
+            right = child + 1
+            if right < size and elements[right] < elements[child]:
+                child = right
+            child_entry = elements[child]
+            if child_entry < entry:
+                elements[index] = child_entry
+                positions[child_entry[2]] = index
+                index = child
+                child = 2 * index + 1
+                continue
+            break
+        elements[index] = entry
+        positions[entry[2]] = index
+        return index
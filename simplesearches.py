@@ -2,6 +2,9 @@ import time
 import random
 
 from gui import GUI
+import mapfile
+from gridmap import GridMap
+from pathengine import PathfindingEngine, SearchResult
 import pygame
 
 pygame.font.init()
@@ -42,7 +45,6 @@ class PathfindingTile:
         self.row, self.col = pos
         self.__rect = self.__generate_rect(self.row, self.col)
         self.tag = tag
-        self.neighbours = set()
 
     def get_pos(self) -> tuple[int, int]:
         """
@@ -83,6 +85,13 @@ class PathfindingTile:
         self.tag = self.WALL
         self.color = WALL_TILE
 
+    def clear_wall(self) -> None:
+        """
+        Sets the tile back to a normal TILE and sets the color of the tile to the DEFAULT_TILE color
+        """
+        self.tag = self.TILE
+        self.color = DEFAULT_TILE
+
     def set_start(self) -> None:
         """
         Sets the tile to a START_TILE
@@ -95,6 +104,14 @@ class PathfindingTile:
         """
         self.tag = self.END_TILE
 
+    def get_rect(self) -> pygame.Rect:
+        """
+        Gets the area of the window the tile is drawn in
+        :return: The rect of the tile
+        :rtype: pygame.Rect
+        """
+        return self.__rect
+
     @staticmethod
     def __generate_rect(row, col) -> pygame.Rect:
         """
@@ -138,37 +155,52 @@ class PathfindingTile:
         self.visited = True
         self.color = color
 
-    def set_neighbours(self, neighbours: set) -> None:
-        """
-        Stores the set of neighbours for the tile
-        :param neighbours: The new set of neighbours for the tile
-        """
-        self.neighbours = neighbours
-
 
 class ShowPathfindingGUI(GUI):
     """
     Generic class for a pathfinding GUI
     """
-    def __init__(self, width: int, height: int, algo_name: str, frame_time=FRAME_LENGTH) -> None:
+    def __init__(self, width: int, height: int, algo_name: str, frame_time=FRAME_LENGTH,
+                 headless: bool = False, map_file: str = None) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
         :param algo_name: Name of the algorithm being run
-        """
+        :param headless: If True no window is opened and the algorithm runs without drawing or waiting
+        :param map_file: Map file to load (binary or ASCII, see mapfile) instead of generating a random map,
+            the window is sized to fit it
+        """
+        loaded_map = None
+        if map_file is not None:
+            loaded_map = mapfile.read_map(map_file)
+            width = loaded_map.rows * TILE_SIZE
+            height = loaded_map.cols * TILE_SIZE
         super().__init__(width, height)
-        self._create_window(algo_name)
+        self.headless = headless
+        if not headless:
+            self._create_window(algo_name)
+        # The grid the algorithms run on, the tiles are only needed to draw it
+        self.grid = GridMap(width // TILE_SIZE, height // TILE_SIZE) if loaded_map is None else loaded_map
         self.map_tiles = []
-        for row in range(width // TILE_SIZE):
-            r = []
-            for col in range(height // TILE_SIZE):
-                r.append(PathfindingTile((row, col)))
-            self.map_tiles.append(r)
+        if not headless:
+            for row in range(self.grid.rows):
+                r = []
+                for col in range(self.grid.cols):
+                    r.append(PathfindingTile((row, col)))
+                self.map_tiles.append(r)
+
+        # Pre-rendered walls and grid lines, and the tiles that changed since the last frame
+        self._background = None
+        self._dirty_tiles = set()
 
         self._start_pos = (0, 0)
         self._end_pos = (0, 0)
-        self.generate_map(NO_OF_WALLS)
+        if loaded_map is None:
+            self.generate_map(NO_OF_WALLS)
+        else:
+            self.set_map(loaded_map)
         self.complete = False
+        self.result = None
         self._frame_time = frame_time
 
     def start(self, wait_time: float) -> None:
@@ -176,65 +208,95 @@ class ShowPathfindingGUI(GUI):
         Starts the pathfinding solver
         :param wait_time: The time to wait before starting the algorithm
         """
-        time.sleep(wait_time)
+        if not self.headless:
+            # Every open tile can be visited once
+            self.scheduler.plan(self.grid.size - self.grid.walls.count(1))
+            time.sleep(wait_time)
         self.solve()
+        # Shows any changes made since the last frame
+        self.draw(force=True)
 
-    def __generate_tile_neighbours(self) -> None:
-        """
-        Generates all neighbour sets for all tiles
-        """
-        directions = {(0, 1),
-                      (1, 0),
-                      (0, -1),
-                      (-1, 0)}
-        for row in range(len(self.map_tiles)):
-            for col in range(len(self.map_tiles[0])):
-                new_neighbours = set()
-                for (x, y) in directions:
-                    neighbour_row = row + x
-                    neighbour_col = col + y
-                    if neighbour_row < 0 or neighbour_row >= len(self.map_tiles) \
-                            or neighbour_col < 0 or neighbour_col >= len(self.map_tiles[0]):
-                        continue
-                    if not self.map_tiles[neighbour_row][neighbour_col].is_wall():
-                        new_neighbours.add(self.map_tiles[neighbour_row][neighbour_col])
-                self.map_tiles[row][col].set_neighbours(new_neighbours)
-
-    def generate_map(self, max_walls: int) -> None:
+    def _create_engine(self, start_pos: tuple[int, int] = None) -> PathfindingEngine:
         """
-        Generates a random map for the pathfinder to run through
-        :param max_walls: The maximum number of walls to generate
+        Creates the engine that runs the algorithms on this map
+        When the GUI is not headless the engine animates every tile it visits.
+        :param start_pos: Position to search from (defaults to the start tile)
+        :return: A new engine for this map
+        :rtype: PathfindingEngine
         """
-        # Generates the walls for the map
-        self.__generate_walls(max_walls)
+        on_visit = None if self.headless else self._visit_tile
+        return PathfindingEngine(self.grid, start_pos, on_visit=on_visit, record_visits=False)
 
-        # Generates the starting position
-        self._start_pos = self.generate_random_position(self._width, self._height)
-        x, y = self._start_pos
-        while self.map_tiles[x][y].is_wall(): # self.map_tiles[x][y]:
-            self._start_pos = self.generate_random_position(self._width, self._height)
-            x, y = self._start_pos
-        self.map_tiles[x][y].set_start()
+    def _visit_tile(self, pos: tuple[int, int]) -> None:
+        """
+        Marks a tile as visited and redraws the window
+        :param pos: Position of the tile the engine has just visited
+        """
+        x, y = pos
+        self.map_tiles[x][y].visit()
+        self._dirty_tiles.add(pos)
+        self.draw()
 
-        # Generates the ending position
-        self._end_pos = self.generate_random_position(self._width, self._height)
-        x, y = self._end_pos
-        while self.map_tiles[x][y].is_wall() or self.map_tiles[x][y].is_end_tile(): # self.map_tiles[x][y]:
-            self._end_pos = self.generate_random_position(self._width, self._height)
-            x, y = self._end_pos
-        self.map_tiles[x][y].set_end()
+    def display_path(self, path: list[tuple[int, int]]) -> None:
+        """
+        Displays the path found by the engine, drawing it from the end tile back to the start tile
+        :param path: Positions on the path from the start tile to the end tile
+        """
+        if self.headless or not path:
+            return
+        x, y = path[0]
+        # GREEN
+        self.map_tiles[x][y].color = (7, 138, 0)
+        self._dirty_tiles.add(path[0])
+        for x, y in reversed(path[1:]):
+            self.map_tiles[x][y].color = (7, 138, 0)
+            self._dirty_tiles.add((x, y))
+            self.draw()
 
-        self.__generate_tile_neighbours()
+    def print_result(self) -> None:
+        """
+        Prints the result of the search to the command line
+        """
+        if self.result is None or not self.result.found:
+            print("No path could be found!!")
+            return
+        print("A path was found")
+        if self.headless:
+            print(f"\tPath length: {self.result.cost:g}, nodes expanded: {self.result.expanded}")
 
-    def __generate_walls(self, max_walls: int) -> None:
+    def generate_map(self, max_walls: int, seed: int = None) -> None:
         """
-        Generates a number of walls randomly on the map
+        Generates a random map for the pathfinder to run through
         :param max_walls: The maximum number of walls to generate
+        :param seed: Seed for the map, the same seed always gives the same map
+        """
+        grid = GridMap.random(self.grid.rows, self.grid.cols, max_walls, seed)
+        # Lets the searches answer straight away when the end tile is walled off
+        # (not done for loaded maps, which can be too big to label quickly)
+        grid.build_components()
+        self.set_map(grid)
+
+    def set_map(self, grid: GridMap) -> None:
+        """
+        Uses a map for the pathfinder to run through
+        :param grid: The map, the same size as the window
         """
-        for _ in range(max_walls):
-            x, y = self.generate_random_position(self._width, self._height)
-            # self.map_tiles[x][y] = True
-            self.map_tiles[x][y].set_wall()
+        self.grid = grid
+        self._start_pos = self.grid.start_pos
+        self._end_pos = self.grid.end_pos
+
+        # Copies the map onto the tiles used for drawing
+        for row in self.map_tiles:
+            for tile in row:
+                if self.grid.is_wall(tile.get_pos()):
+                    tile.set_wall()
+        if self.map_tiles:
+            x, y = self._start_pos
+            self.map_tiles[x][y].set_start()
+            x, y = self._end_pos
+            self.map_tiles[x][y].set_end()
+        # The static layer has to be rendered again for the new map
+        self._background = None
 
     @staticmethod
     def generate_random_position(width: int, height: int) -> tuple[int, int]:
@@ -269,115 +331,164 @@ class ShowPathfindingGUI(GUI):
         """
         pass
 
-    def draw(self) -> None:
+    def __render_background(self) -> pygame.Surface:
         """
-        Redraws the window
+        Renders the tiles and grid lines as they are at the start of the search
+        :return: Surface holding the rendered map
+        :rtype: pygame.Surface
         """
-        if self.check_events_exit():
-            exit()
-
-        self.window.fill((0, 0, 0))
+        background = pygame.Surface((self._width, self._height))
+        background.fill(BLACK)
 
-        # Redrawing the tiles
-        for row in range(len(self.map_tiles)):
-            for col in range(len(self.map_tiles[0])):
-                self.map_tiles[row][col].draw(self.window)
+        for row in self.map_tiles:
+            for tile in row:
+                tile.draw(background)
 
         # Draw grid lines
         for row in range(self._width // TILE_SIZE):
-            pygame.draw.line(self.window, (0, 0, 0), (row * TILE_SIZE, 0), (row * TILE_SIZE, self._height), 1)
+            pygame.draw.line(background, BLACK, (row * TILE_SIZE, 0), (row * TILE_SIZE, self._height), 1)
         for col in range(self._height // TILE_SIZE):
-            pygame.draw.line(self.window, (0, 0, 0), (0, col * TILE_SIZE), (self._width, col * TILE_SIZE), 1)
+            pygame.draw.line(background, BLACK, (0, col * TILE_SIZE), (self._width, col * TILE_SIZE), 1)
+        return background
 
-        pygame.display.update()
-        time.sleep(self._frame_time)
+    def __draw_tile(self, pos: tuple[int, int]) -> pygame.Rect:
+        """
+        Redraws a single tile and the grid lines along its top and left edges
+        :param pos: Position of the tile
+        :return: The area of the window that was redrawn
+        :rtype: pygame.Rect
+        """
+        x, y = pos
+        tile = self.map_tiles[x][y]
+        tile.draw(self.window)
+        rect = tile.get_rect()
+        pygame.draw.line(self.window, BLACK, rect.topleft, (rect.left, rect.top + TILE_SIZE), 1)
+        pygame.draw.line(self.window, BLACK, rect.topleft, (rect.left + TILE_SIZE, rect.top), 1)
+        return rect
+
+    def draw(self, force: bool = False) -> None:
+        """
+        Redraws the window
+        Only the tiles that changed since the last frame are redrawn and updated on the display.
+        :param force: If True a frame is shown even if the scheduler says one is not due
+        """
+        if self.window is None:
+            return
+        if not force and not self.scheduler.frame_due():
+            return
+        if self.check_events_exit():
+            exit()
+
+        if self._background is None:
+            # First frame for this map: show the whole static layer
+            self._background = self.__render_background()
+            self.window.blit(self._background, (0, 0))
+            for pos in self._dirty_tiles:
+                self.__draw_tile(pos)
+            pygame.display.update()
+        else:
+            changed = [self.__draw_tile(pos) for pos in self._dirty_tiles]
+            if changed:
+                pygame.display.update(changed)
+        self._dirty_tiles.clear()
+
+        self.scheduler.frame_presented(self._frame_time)
 
 
 class DepthFirstSearch(ShowPathfindingGUI):
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
         """
-        super().__init__(width, height, "Depth-First Search")
+        super().__init__(width, height, "Depth-First Search", headless=headless,
+                         map_file=map_file)
         self.draw()
 
-    def dfs(self, row: int, col: int) -> None:
+    def dfs(self, row: int, col: int) -> SearchResult:
         """
         Runs a DFS from the passed tile position
-        :param row: The row of the current tile
-        :param col: The column of the current tile
+        :param row: The row of the start tile
+        :param col: The column of the start tile
+        :return: The result of the search
+        :rtype: SearchResult
         """
-        node = self.map_tiles[row][col]
-        if not node.visited:
-            node.visit()
-            self.draw()
-            if node.is_end_tile():
-                self.complete = True
-                return
-            for neighbour in node.neighbours:
-                self.dfs(neighbour.row, neighbour.col)
-                if self.complete:
-                    return
+        return self._create_engine((row, col)).dfs()
 
     def solve(self) -> None:
         """
         Runs the DFS and prints results to command line
         """
         row, col = self._start_pos
-        self.dfs(row, col)
-        if self.complete:
-            print("A path was found")
-        else:
-            print("No path could be found!!")
+        self.result = self.dfs(row, col)
+        self.complete = self.result.found
+        self._frame_time = 0.05
+        self.display_path(self.result.path)
+        self.print_result()
 
 
 class BreadthFirstSearch(ShowPathfindingGUI):
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
         """
-        super().__init__(width, height, "Breadth-First Search")
+        super().__init__(width, height, "Breadth-First Search", headless=headless,
+                         map_file=map_file)
         self.draw()
 
-    def bfs(self, row: int, col: int) -> None:
+    def bfs(self, row: int, col: int) -> SearchResult:
         """
         Runs the BFS from the passed start tile location
         :param row: The start position's row
         :param col: The start position's column
+        :return: The result of the search
+        :rtype: SearchResult
         """
-        visited = []
-        queue = []
-
-        node = self.map_tiles[row][col]
-        visited.append(node)
-        node.visit()
-        self.draw()
-        queue.append(node)
-
-        while queue:
-            n = queue.pop(0)
-            for neighbour in n.neighbours:
-                if neighbour not in visited:
-                    visited.append(neighbour)
-                    neighbour.visit()
-                    queue.append(neighbour)
-                    self.draw()
-                    if neighbour.is_end_tile():
-                        self.complete = True
-                        return
+        return self._create_engine((row, col)).bfs()
 
     def solve(self) -> None:
         """
         Runs the BFS and prints the results to the command line
         """
         row, col = self._start_pos
-        self.bfs(row, col)
-        if self.complete:
-            print("A path was found")
-        else:
-            print("No path could be found!!")
+        self.result = self.bfs(row, col)
+        self.complete = self.result.found
+        self._frame_time = 0.05
+        self.display_path(self.result.path)
+        self.print_result()
+
 
+class BidirectionalBreadthFirstSearch(ShowPathfindingGUI):
+    def __init__(self, width: int, height: int, headless: bool = False, map_file: str = None) -> None:
+        """
+        :param width: Width of the window
+        :param height: Height of the window
+        :param headless: If True runs without opening a window
+        :param map_file: Map file to load instead of generating a random map
+        """
+        super().__init__(width, height, "Bidirectional Breadth-First Search", headless=headless,
+                         map_file=map_file)
+        self.draw()
 
+    def bidirectional_bfs(self) -> SearchResult:
+        """
+        Runs a BFS from the start tile and the end tile at the same time
+        :return: The result of the search
+        :rtype: SearchResult
+        """
+        return self._create_engine().bidirectional_bfs()
 
+    def solve(self) -> None:
+        """
+        Runs the bidirectional BFS and prints the results to the command line
+        """
+        self.result = self.bidirectional_bfs()
+        self.complete = self.result.found
+        self._frame_time = 0.05
+        self.display_path(self.result.path)
+        self.print_result()
@@ -0,0 +1,688 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Iterator
+
+# Operations in a sorting trace, each event is (operation, first index, second index)
+# COMPARE: the values at the two indexes were compared
+# SWAP: the values at the two indexes were swapped
+# WRITE: a value was written to the first index, the second index is where the value came from
+COMPARE = 0
+SWAP = 1
+WRITE = 2
+OPERATION_NAMES = ("compare", "swap", "write")
+
+# Name of each sorting algorithm -> the SortingEngine method that runs it
+SORTS = {"bubble": "bubble_sort", "merge": "merge_sort", "natural-merge": "natural_merge_sort",
+         "quick": "quick_sort"}
+
+# Wins in a row after which the natural merge sort starts galloping
+MIN_GALLOP = 7
+# Shortest run the natural merge sort merges, shorter runs are extended with an insertion sort
+MIN_RUN = 32
+
+# Ways Quick Sort can pick its pivot
+PIVOTS = ("last", "median-of-three", "random")
+# Sections Quick Sort leaves to an insertion sort are at most this long
+INSERTION_SORT_SIZE = 16
+
+
+class SortResult:
+    """
+    The outcome of running a sorting algorithm
+    """
+    def __init__(self, comparisons: int, swaps: int, writes: int, elapsed: float) -> None:
+        """
+        :param comparisons: Number of times two values were compared
+        :param swaps: Number of times two values were swapped
+        :param writes: Number of values written (copied into place, not swapped)
+        :param elapsed: Time taken in seconds
+        """
+        self.comparisons = comparisons
+        self.swaps = swaps
+        self.writes = writes
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        """
+        String representation of SortResult
+        :return: Representation of SortResult
+        :rtype: str
+        """
+        return f"SortResult(comparisons={self.comparisons}, swaps={self.swaps}, writes={self.writes}, " \
+               f"elapsed={self.elapsed:.4f})"
+
+
+class SortingEngine:
+    """
+    Runs the sorting algorithms on a list in place without drawing anything.
+    Every algorithm is a generator of trace events (see COMPARE, SWAP and WRITE) so a GUI can show each step.
+    With tracing off the generators yield nothing and the algorithms run at full speed.
+    """
+    def __init__(self, values: list, trace: bool = True) -> None:
+        """
+        :param values: The list to sort, any values that can be compared with < and <=
+        :param trace: If the algorithms yield an event for every operation
+        """
+        self.values = values
+        self.trace = trace
+        self.comparisons = 0
+        self.swaps = 0
+        self.writes = 0
+
+    def events(self, name: str, **options) -> Iterator[tuple[int, int, int]]:
+        """
+        Starts a sorting algorithm, the list is sorted once the events have all been read
+        :param name: Name of the algorithm, a key of SORTS
+        :param options: Options for the algorithm (e.g. pivot for Quick Sort)
+        :return: The trace events of the algorithm (none if tracing is off)
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        if name not in SORTS:
+            raise ValueError(f"Unknown sort '{name}', expected one of {tuple(SORTS)}")
+        return getattr(self, SORTS[name])(**options)
+
+    def run(self, name: str, **options) -> SortResult:
+        """
+        Runs a sorting algorithm to the end
+        :param name: Name of the algorithm, a key of SORTS
+        :param options: Options for the algorithm (e.g. pivot for Quick Sort)
+        :return: The operation counts and time taken
+        :rtype: SortResult
+        """
+        start_time = time.perf_counter()
+        for _ in self.events(name, **options):
+            pass
+        return self.result(time.perf_counter() - start_time)
+
+    def result(self, elapsed: float = 0.0) -> SortResult:
+        """
+        Creates the result of the algorithms run so far
+        :param elapsed: Time taken in seconds
+        :return: The operation counts
+        :rtype: SortResult
+        """
+        return SortResult(self.comparisons, self.swaps, self.writes, elapsed)
+
+    def bubble_sort(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Bubble Sort: swaps neighbouring values that are out of order until a pass swaps nothing
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        comparisons = swaps = 0
+        changed = len(values) > 1
+
+        while changed:
+            changed = False
+            comparisons += len(values) - 1
+            for i in range(len(values) - 1):
+                if trace:
+                    yield COMPARE, i, i + 1
+                if values[i] > values[i + 1]:
+                    values[i], values[i + 1] = values[i + 1], values[i]
+                    swaps += 1
+                    changed = True
+                    if trace:
+                        yield SWAP, i, i + 1
+
+        self.comparisons += comparisons
+        self.swaps += swaps
+
+    def merge_sort(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Merge Sort: sorts each half of the list, then merges the halves together
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        yield from self.__merge_sort(0, len(self.values) - 1)
+
+    def __merge_sort(self, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Splits a section of the list in half, sorts the halves and merges them together again
+        :param start: Starting index
+        :param end: Ending index
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        if start < end:
+            middle = (start + end) // 2
+            yield from self.__merge_sort(start, middle)
+            yield from self.__merge_sort(middle + 1, end)
+            yield from self.__merge(start, middle, end)
+
+    def __merge(self, start: int, middle: int, end: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Merges together two sorted sections next to each other
+        :param start: Index of the start of the first section
+        :param middle: Index of the end of the first section
+        :param end: Index of the end of the second section
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        left = values[start:middle + 1]
+        right = values[middle + 1:end + 1]
+        left_length = len(left)
+        right_length = len(right)
+        i = j = 0
+        k = start
+
+        while i < left_length and j < right_length:
+            if trace:
+                yield COMPARE, start + i, middle + 1 + j
+            # Taking from the left on ties keeps equal values in order
+            if right[j] < left[i]:
+                values[k] = right[j]
+                if trace:
+                    yield WRITE, k, middle + 1 + j
+                j += 1
+            else:
+                values[k] = left[i]
+                if trace:
+                    yield WRITE, k, start + i
+                i += 1
+            k += 1
+
+        # Every comparison wrote one value, whatever is left of the right section is already in place
+        comparisons = k - start
+        writes = comparisons + left_length - i
+        if trace:
+            while i < left_length:
+                values[k] = left[i]
+                yield WRITE, k, start + i
+                i += 1
+                k += 1
+        else:
+            values[k:k + left_length - i] = left[i:]
+
+        self.comparisons += comparisons
+        self.writes += writes
+
+    def natural_merge_sort(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Natural Merge Sort: finds the runs already in order, then merges neighbouring runs bottom-up
+        One buffer is allocated for the whole sort. Each merge skips the values already in place and
+        gallops (copies many values at once) when one run keeps winning, so sorted or nearly sorted
+        lists take close to linear time. Runs shorter than MIN_RUN are extended with an insertion sort.
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        length = len(self.values)
+        # Index where each run starts, then the length of the list
+        bounds = yield from self.__find_runs()
+        buffer = [None] * length
+
+        while len(bounds) > 2:
+            merged = []
+            for r in range(0, len(bounds) - 2, 2):
+                yield from self.__merge_runs(bounds[r], bounds[r + 1], bounds[r + 2], buffer)
+                merged.append(bounds[r])
+            # With an odd number of runs the last one waits for the next pass
+            if len(bounds) % 2 == 0:
+                merged.append(bounds[-2])
+            merged.append(length)
+            bounds = merged
+
+    def __find_runs(self) -> Iterator[tuple[int, int, int]]:
+        """
+        Splits the list into runs of values in order, runs in descending order are reversed
+        :return: The trace events, then the index where each run starts followed by the length of the list
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        length = len(values)
+        comparisons = swaps = writes = 0
+        bounds = [0]
+        start = 0
+
+        while start < length:
+            end = start + 1
+            if end < length:
+                comparisons += 1
+                if trace:
+                    yield COMPARE, start, end
+                # Only strictly descending runs are reversed, so equal values stay in order
+                descending = values[end] < values[start]
+                end += 1
+                while end < length:
+                    comparisons += 1
+                    if trace:
+                        yield COMPARE, end - 1, end
+                    if (values[end] < values[end - 1]) != descending:
+                        break
+                    end += 1
+                if descending:
+                    # Reversing in place by swapping from both ends towards the middle
+                    i = start
+                    j = end - 1
+                    while i < j:
+                        values[i], values[j] = values[j], values[i]
+                        if trace:
+                            yield SWAP, i, j
+                        i += 1
+                        j -= 1
+                    swaps += (end - start) // 2
+
+            # Short runs are made MIN_RUN long with a binary insertion sort, so random lists do not
+            # end up with thousands of tiny runs to merge
+            stop = min(start + MIN_RUN, length)
+            while end < stop:
+                value = values[end]
+                low = start
+                high = end
+                while low < high:
+                    middle = (low + high) // 2
+                    comparisons += 1
+                    if trace:
+                        yield COMPARE, middle, end
+                    # Inserting after equal values keeps them in order
+                    if value < values[middle]:
+                        high = middle
+                    else:
+                        low = middle + 1
+                # Shifting the larger values up one place, from the back so nothing is overwritten
+                for i in range(end, low, -1):
+                    values[i] = values[i - 1]
+                    if trace:
+                        yield WRITE, i, i - 1
+                values[low] = value
+                if trace:
+                    yield WRITE, low, end
+                writes += end + 1 - low
+                end += 1
+            bounds.append(end)
+            start = end
+
+        self.comparisons += comparisons
+        self.swaps += swaps
+        self.writes += writes
+        return bounds
+
+    def __gallop(self, key, key_index: int, source: list, offset: int, first: int, last: int,
+                 take_equal: bool) -> Iterator[tuple[int, int, int]]:
+        """
+        Finds how many values at the start of a sorted section come before a key
+        Checks 1, 2, 4, 8... values in until one does not, then does a binary search between the last two checked.
+        :param key: The value to look for
+        :param key_index: Index of the key in the list, used for the trace
+        :param source: The list (or buffer) holding the section
+        :param offset: Added to an index of the source to get the index in the list, used for the trace
+        :param first: Index of the first value in the section
+        :param last: Index after the last value in the section
+        :param take_equal: If values equal to the key come before it
+        :return: The trace events, then the index of the first value in the section that does not come before the key
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        trace = self.trace
+        comparisons = 0
+        low = first
+        high = last
+        step = 1
+        while first + step - 1 < last:
+            probe = first + step - 1
+            comparisons += 1
+            if trace:
+                yield COMPARE, offset + probe, key_index
+            if (not key < source[probe]) if take_equal else (source[probe] < key):
+                low = probe + 1
+                step *= 2
+            else:
+                high = probe
+                break
+
+        while low < high:
+            middle = (low + high) // 2
+            comparisons += 1
+            if trace:
+                yield COMPARE, offset + middle, key_index
+            if (not key < source[middle]) if take_equal else (source[middle] < key):
+                low = middle + 1
+            else:
+                high = middle
+
+        self.comparisons += comparisons
+        return low
+
+    def __merge_runs(self, start: int, middle: int, end: int, buffer: list) -> Iterator[tuple[int, int, int]]:
+        """
+        Merges together two runs next to each other, using the buffer to hold the first run
+        :param start: Index of the start of the first run
+        :param middle: Index of the start of the second run
+        :param end: Index after the end of the second run
+        :param buffer: Buffer at least as long as the first run
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        # Values at the start of the first run that are not after the second run's first value are in place
+        start = yield from self.__gallop(values[middle], middle, values, 0, start, middle, True)
+        if start == middle:
+            return
+        # Values at the end of the second run that are not before the first run's last value are in place
+        end = yield from self.__gallop(values[middle - 1], middle - 1, values, 0, middle, end, False)
+
+        left_length = middle - start
+        # Copying with a loop, as slicing would make a new list for every merge
+        for n in range(left_length):
+            buffer[n] = values[start + n]
+        comparisons = 0
+        i = 0
+        j = middle
+        k = start
+
+        while i < left_length and j < end:
+            # Taking one value at a time until one run wins MIN_GALLOP times in a row
+            left_wins = right_wins = 0
+            while i < left_length and j < end:
+                comparisons += 1
+                if trace:
+                    yield COMPARE, start + i, j
+                # Taking from the first run on ties keeps equal values in order
+                if values[j] < buffer[i]:
+                    values[k] = values[j]
+                    if trace:
+                        yield WRITE, k, j
+                    j += 1
+                    k += 1
+                    right_wins += 1
+                    left_wins = 0
+                    if right_wins >= MIN_GALLOP:
+                        break
+                else:
+                    values[k] = buffer[i]
+                    if trace:
+                        yield WRITE, k, start + i
+                    i += 1
+                    k += 1
+                    left_wins += 1
+                    right_wins = 0
+                    if left_wins >= MIN_GALLOP:
+                        break
+
+            # Galloping: copying every value that wins in one go, until both runs win fewer than MIN_GALLOP
+            while i < left_length and j < end:
+                found = yield from self.__gallop(values[j], j, buffer, start, i, left_length, True)
+                left_count = found - i
+                for n in range(left_count):
+                    values[k + n] = buffer[i + n]
+                    if trace:
+                        yield WRITE, k + n, start + i + n
+                i = found
+                k += left_count
+                if i == left_length:
+                    break
+
+                found = yield from self.__gallop(buffer[i], start + i, values, 0, j, end, False)
+                right_count = found - j
+                # Copying forwards is safe as k is never after j
+                for n in range(right_count):
+                    values[k + n] = values[j + n]
+                    if trace:
+                        yield WRITE, k + n, j + n
+                j = found
+                k += right_count
+                if left_count < MIN_GALLOP and right_count < MIN_GALLOP:
+                    break
+
+        # Whatever is left of the second run is already in place
+        for n in range(left_length - i):
+            values[k + n] = buffer[i + n]
+            if trace:
+                yield WRITE, k + n, start + i + n
+        self.comparisons += comparisons
+        self.writes += j - start
+
+    def quick_sort(self, pivot: str = "median-of-three", three_way: bool = False) -> Iterator[tuple[int, int, int]]:
+        """
+        Quick Sort: puts a pivot value in its final place with the smaller values before it and the
+        larger values after it, then sorts the values on each side
+        Like introsort, sections of at most INSERTION_SORT_SIZE values are finished with an insertion sort
+        and sections still unsorted after about 2 * log2(n) partitions are finished with a heap sort,
+        so the worst case stays O(n log n) whatever the pivots are.
+        :param pivot: How the pivot is picked, one of PIVOTS
+        :param three_way: If True values equal to the pivot are gathered in the middle (Dutch national flag
+            partitioning), which keeps lists with many duplicates fast
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        if pivot not in PIVOTS:
+            raise ValueError(f"Unknown pivot '{pivot}', expected one of {PIVOTS}")
+        # Sections still to be sorted, with the number of partitions left before switching to heap sort
+        sections = [(0, len(self.values) - 1, 2 * len(self.values).bit_length())]
+
+        while sections:
+            low, high, depth = sections.pop()
+            if high - low < INSERTION_SORT_SIZE:
+                yield from self.__insertion_sort(low, high)
+                continue
+            if depth == 0:
+                yield from self.__heap_sort(low, high)
+                continue
+
+            pivot_index = yield from self.__choose_pivot(pivot, low, high)
+            if three_way:
+                first, last = yield from self.__partition_three_way(low, high, pivot_index)
+            else:
+                first = last = yield from self.__partition(low, high, pivot_index)
+            # Sorting the smaller side first (it is taken off next) means at most about log2(n) sections wait
+            smaller = (low, first - 1, depth - 1)
+            larger = (last + 1, high, depth - 1)
+            if first - low > high - last:
+                smaller, larger = larger, smaller
+            sections.append(larger)
+            sections.append(smaller)
+
+    def __choose_pivot(self, pivot: str, low: int, high: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Picks the pivot of a section
+        :param pivot: How the pivot is picked, one of PIVOTS
+        :param low: The starting index
+        :param high: The ending index
+        :return: The trace events, then the index of the pivot
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        if pivot == "last":
+            return high
+        if pivot == "random":
+            return random.randint(low, high)
+
+        # Median of the first, middle and last values
+        values = self.values
+        trace = self.trace
+        first = low
+        middle = (low + high) // 2
+        self.comparisons += 2
+        if trace:
+            yield COMPARE, first, middle
+        if values[middle] < values[first]:
+            first, middle = middle, first
+        if trace:
+            yield COMPARE, middle, high
+        if not values[high] < values[middle]:
+            return middle
+        self.comparisons += 1
+        if trace:
+            yield COMPARE, first, high
+        return first if values[high] < values[first] else high
+
+    def __partition(self, low: int, high: int, pivot_index: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Moves the values not after the pivot before it and the rest after it
+        :param low: The starting index
+        :param high: The ending index
+        :param pivot_index: Index of the pivot
+        :return: The trace events, then the index the pivot ended up at
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        swaps = 0
+        # Using the last place for the pivot
+        if pivot_index != high:
+            values[pivot_index], values[high] = values[high], values[pivot_index]
+            swaps += 1
+            if trace:
+                yield SWAP, pivot_index, high
+        pivot = values[high]
+        i = low - 1
+        for j in range(low, high):
+            if trace:
+                yield COMPARE, j, high
+            if values[j] <= pivot:
+                i += 1
+                if i != j:
+                    values[i], values[j] = values[j], values[i]
+                    swaps += 1
+                    if trace:
+                        yield SWAP, i, j
+        i += 1
+        if i != high:
+            values[i], values[high] = values[high], values[i]
+            swaps += 1
+            if trace:
+                yield SWAP, i, high
+
+        self.comparisons += high - low
+        self.swaps += swaps
+        return i
+
+    def __partition_three_way(self, low: int, high: int, pivot_index: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Moves the values before the pivot to the start, the values after it to the end and the values
+        equal to it to the middle
+        :param low: The starting index
+        :param high: The ending index
+        :param pivot_index: Index of the pivot
+        :return: The trace events, then the indexes of the first and last values equal to the pivot
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        comparisons = swaps = 0
+        # The pivot is left where it is until the scan reaches it, so sorted sections stay sorted on both sides
+        pivot = values[pivot_index]
+        # values[low:lt] are before the pivot, values[lt:gt] equal to it and values[gt:i] after it
+        lt = gt = low
+        for i in range(low, high + 1):
+            comparisons += 1
+            if trace:
+                # Once the scan has passed the pivot, values[lt] is equal to it
+                yield COMPARE, i, pivot_index if i <= pivot_index else lt
+            if values[i] < pivot:
+                # Moving the value to the end of the smaller values, past the equal values
+                if i != gt:
+                    values[gt], values[i] = values[i], values[gt]
+                    swaps += 1
+                    if trace:
+                        yield SWAP, gt, i
+                if lt != gt:
+                    values[lt], values[gt] = values[gt], values[lt]
+                    swaps += 1
+                    if trace:
+                        yield SWAP, lt, gt
+                lt += 1
+                gt += 1
+                continue
+            comparisons += 1
+            if trace:
+                yield COMPARE, i, pivot_index if i <= pivot_index else lt
+            if not pivot < values[i]:
+                if i != gt:
+                    values[gt], values[i] = values[i], values[gt]
+                    swaps += 1
+                    if trace:
+                        yield SWAP, gt, i
+                gt += 1
+
+        self.comparisons += comparisons
+        self.swaps += swaps
+        return lt, gt - 1
+
+    def __insertion_sort(self, low: int, high: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Insertion Sort of a section, swapping each value back until the value before it is not after it
+        :param low: The starting index
+        :param high: The ending index
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        comparisons = swaps = 0
+        for i in range(low + 1, high + 1):
+            j = i
+            while j > low:
+                comparisons += 1
+                if trace:
+                    yield COMPARE, j - 1, j
+                if not values[j] < values[j - 1]:
+                    break
+                values[j - 1], values[j] = values[j], values[j - 1]
+                swaps += 1
+                if trace:
+                    yield SWAP, j - 1, j
+                j -= 1
+
+        self.comparisons += comparisons
+        self.swaps += swaps
+
+    def __heap_sort(self, low: int, high: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Heap Sort of a section: turns it into a max heap, then swaps the largest value to the end over and over
+        :param low: The starting index
+        :param high: The ending index
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        size = high - low + 1
+        for root in range(size // 2 - 1, -1, -1):
+            yield from self.__sift_down(low, root, size)
+        for end in range(size - 1, 0, -1):
+            values[low], values[low + end] = values[low + end], values[low]
+            self.swaps += 1
+            if self.trace:
+                yield SWAP, low, low + end
+            yield from self.__sift_down(low, 0, end)
+
+    def __sift_down(self, low: int, root: int, size: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Moves a value down a heap until it is not smaller than its children
+        :param low: Index of the top of the heap
+        :param root: Position of the value in the heap
+        :param size: Number of values in the heap
+        :return: The trace events
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        values = self.values
+        trace = self.trace
+        comparisons = swaps = 0
+        child = 2 * root + 1
+        while child < size:
+            if child + 1 < size:
+                comparisons += 1
+                if trace:
+                    yield COMPARE, low + child, low + child + 1
+                if values[low + child] < values[low + child + 1]:
+                    child += 1
+            comparisons += 1
+            if trace:
+                yield COMPARE, low + root, low + child
+            if not values[low + root] < values[low + child]:
+                break
+            values[low + root], values[low + child] = values[low + child], values[low + root]
+            swaps += 1
+            if trace:
+                yield SWAP, low + root, low + child
+            root = child
+            child = 2 * root + 1
+
+        self.comparisons += comparisons
+        self.swaps += swaps
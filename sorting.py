@@ -1,8 +1,10 @@
 from __future__ import annotations
+import math
 import pygame
 import time
 import random
 from gui import GUI
+from sortengine import SortingEngine, SortResult
 
 pygame.font.init()
 
@@ -22,23 +24,16 @@ BLUE    = (  0,   0, 255)
 class SortingElement:
     """
     SortingElement is a element that is being sorted
+    Elements have no instance dictionary and compare without any checks, so sorting many of them stays cheap.
+    Comparing with anything that is not a SortingElement raises a TypeError.
     """
+    __slots__ = ("value",)
+
     def __init__(self, value: float) -> None:
         """
         :param value: The value of the element
         """
         self.value = value
-        self.focused = False
-
-    @staticmethod
-    def __is_sorting_element(other) -> bool:
-        """
-        Returns if the passed object is a sorting element
-        :param other: The object to be checked
-        :return: True if other is an instance of SortingElement
-        :rtype: bool
-        """
-        return isinstance(other, SortingElement)
 
     def __ge__(self, other) -> bool:
         """
@@ -47,9 +42,10 @@ class SortingElement:
         :return: A >= B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value >= other.value
+        try:
+            return self.value >= other.value
+        except AttributeError:
+            return NotImplemented
 
     def __le__(self, other) -> bool:
         """
@@ -58,9 +54,10 @@ class SortingElement:
         :return: A <= B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value <= other.value
+        try:
+            return self.value <= other.value
+        except AttributeError:
+            return NotImplemented
 
     def __lt__(self, other) -> bool:
         """
@@ -69,9 +66,10 @@ class SortingElement:
         :return: A < B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value < other.value
+        try:
+            return self.value < other.value
+        except AttributeError:
+            return NotImplemented
 
     def __gt__(self, other) -> bool:
         """
@@ -80,9 +78,10 @@ class SortingElement:
         :return: A > B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value > other.value
+        try:
+            return self.value > other.value
+        except AttributeError:
+            return NotImplemented
 
     def __eq__(self, other) -> bool:
         """
@@ -91,9 +90,10 @@ class SortingElement:
         :return: A == B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value == other.value
+        try:
+            return self.value == other.value
+        except AttributeError:
+            raise TypeError from None
 
     def __ne__(self, other) -> bool:
         """
@@ -102,9 +102,10 @@ class SortingElement:
         :return: A != B
         :rtype: bool
         """
-        if not self.__is_sorting_element(other):
-            raise TypeError
-        return self.value != other.value
+        try:
+            return self.value != other.value
+        except AttributeError:
+            raise TypeError from None
 
     def __int__(self) -> int:
         """
@@ -135,38 +136,69 @@ class ShowSortingGUI(GUI):
     """
     Generic class for a sorting algorithm GUI
     """
-    def __init__(self, width: int, height: int, sort_name: str, frame_length: float = 0.1) -> None:
+    def __init__(self, width: int, height: int, sort_name: str, algorithm: str, frame_length: float = 0.1,
+                 headless: bool = False) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
         :param sort_name: Name of the sorting algorithm
+        :param algorithm: Name of the algorithm in the sorting engine, a key of sortengine.SORTS
         :param frame_length: Length of each frame
+        :param headless: If True no window is opened and the algorithm runs without drawing or waiting
         """
         super().__init__(width, height)
-        self._create_window(sort_name)
+        self.headless = headless
+        if not headless:
+            self._create_window(sort_name)
+        self._algorithm = algorithm
+        # Options for the algorithm in the sorting engine
+        self._sort_options = {}
         self._to_sort = []
+        # Indexes of the elements used since the last frame, these are highlighted in the next frame
+        self._highlighted = set()
         self.complete = False
         self._frame_length = frame_length
+        self.result: SortResult = None
 
     def start(self, wait_time: float) -> None:
         """
         Starts the sorting algorithm
         :param wait_time: Wait time before starting
         """
-        time.sleep(wait_time)
+        if not self.headless:
+            self.scheduler.plan(self.estimate_steps())
+            time.sleep(wait_time)
         self.sort()
+        # Shows any changes made since the last frame
+        self.draw(force=True)
+        if self.headless:
+            print(f"\tElements: {len(self._to_sort)}, comparisons: {self.result.comparisons}, "
+                  f"swaps: {self.result.swaps}, writes: {self.result.writes}")
+
+    def estimate_steps(self) -> int:
+        """
+        Estimates how many times the sort will draw, used to plan the frames
+        :return: Estimated number of steps
+        :rtype: int
+        """
+        length = len(self._to_sort)
+        return max(1, 2 * length * math.ceil(math.log2(length + 1)))
 
-    def draw(self) -> None:
+    def draw(self, force: bool = False) -> None:
         """
         Redraws the window with the newest list
-        :return:
+        Elements used since the last frame are all highlighted.
+        :param force: If True a frame is shown even if the scheduler says one is not due
         """
+        if self.headless or (not force and not self.scheduler.frame_due()):
+            return
         if self.check_events_exit():
             exit()
 
         # Making the window black
         self.window.fill(BLACK)
         length = len(self._to_sort)
+        highlighted = self._highlighted
 
         bar_width = (self._width - (SPACE_BETWEEN_BARS * (length + 1))) / length
 
@@ -176,31 +208,40 @@ class ShowSortingGUI(GUI):
                                self._height - val.value,
                                bar_width,
                                val.value)
-            if self.complete:
-                color = GREEN
-            else:
-                color = GREEN if val.focused else WHITE
-                val.focused = False
-
+            color = GREEN if self.complete or i in highlighted else WHITE
             pygame.draw.rect(self.window, color, rect)
 
+        highlighted.clear()
         pygame.display.update()
-        time.sleep(self._frame_length)
+        self.scheduler.frame_presented(self._frame_length)
 
     def sort(self) -> None:
         """
-        Sort function: implemented in child classes
+        Runs the sorting algorithm in a sorting engine and shows every operation in its trace
+        When headless the engine does not trace anything and sorts at full speed.
         """
-        pass
+        engine = SortingEngine(self._to_sort, trace=not self.headless)
+        start_time = time.perf_counter()
+        highlighted = self._highlighted
+        for _, first, second in engine.events(self._algorithm, **self._sort_options):
+            highlighted.add(first)
+            highlighted.add(second)
+            self.draw()
+        self.result = engine.result(time.perf_counter() - start_time)
+        self.complete = True
+        self.draw()
 
-    def generate_values_to_sort(self, amount: int) -> list[SortingElement]:
+    def generate_values_to_sort(self, amount: int) -> list:
         """
         Generates the list of values being sorted
+        Headless sorts use plain floats, as there are no bars to draw.
         :param amount: Length of list requested
-        :return: Randomly generated list of SortingElements
-        :rtype: list[SortingElement]
+        :return: Randomly generated list of SortingElements (floats when headless)
+        :rtype: list
         """
         max_height = self._height * 0.9
+        if self.headless:
+            return [random.random() * max_height for _ in range(amount)]
         out = []
         for _ in range(amount):
             out.append(SortingElement(random.random() * max_height))
@@ -211,179 +252,63 @@ class BubbleSort(ShowSortingGUI):
     """
     Runs and displays a Bubble Sort
     """
-    def __init__(self, width: int, height: int, elements: int) -> None:
+    def __init__(self, width: int, height: int, elements: int, headless: bool = False) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
         :param elements: Number of elements to sort
+        :param headless: If True runs without opening a window
         """
-        super().__init__(width, height, "Bubble Sort")
+        super().__init__(width, height, "Bubble Sort", "bubble", headless=headless)
         self._to_sort = self.generate_values_to_sort(elements)
         self.draw()
 
-    def sort(self) -> None:
+    def estimate_steps(self) -> int:
         """
-        Runs the Bubble Sort algorithm
+        Estimates how many times the sort will draw, one per comparison
+        :return: Estimated number of steps
+        :rtype: int
         """
-        changed = True
-
-        while changed:
-            changed = False
-            for i in range(len(self._to_sort)-1):
-                self._to_sort[i].focused = True
-                self._to_sort[i + 1].focused = True
-                if self._to_sort[i] > self._to_sort[i+1]:
-                    self._to_sort[i], self._to_sort[i+1] = self._to_sort[i+1], self._to_sort[i]
-                    changed = True
-                self.draw()
-
-        self.complete = True
-        self.draw()
+        return max(1, len(self._to_sort) ** 2)
 
 
 class MergeSort(ShowSortingGUI):
     """
     Runs and displays a Merge Sort
     """
-    def __init__(self, width: int, height: int, elements: int) -> None:
+    def __init__(self, width: int, height: int, elements: int, headless: bool = False, natural: bool = False) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
         :param elements: Number of elements to sort
-        """
-        super().__init__(width, height, "Merge Sort", frame_length=0.02)
+        :param headless: If True runs without opening a window
+        :param natural: If True merges the runs already in order bottom-up with one buffer (natural merge sort)
+            instead of splitting the list in half over and over
+        """
+        if natural:
+            super().__init__(width, height, "Natural Merge Sort", "natural-merge", frame_length=0.02,
+                             headless=headless)
+        else:
+            super().__init__(width, height, "Merge Sort", "merge", frame_length=0.02, headless=headless)
         self._to_sort = self.generate_values_to_sort(elements)
         self.draw()
 
-    def __merge(self, start: int, middle: int, end: int) -> None:
-        """
-        Merges together two split halves and sorts them
-        :param start: Index for the start
-        :param middle: Index for middle
-        :param end: Index for end
-        """
-        left = self._to_sort[start:middle+1]
-        right = self._to_sort[middle+1:end+1]
-
-        i = j = 0
-        k = start
-
-        while i < len(left) and j < len(right):
-            left[i].focused = True
-            right[j].focused = True
-            self.draw()
-            left[i].focused = True
-            right[j].focused = True
-            if left[i] < right[j]:
-                self._to_sort[k] = left[i]
-                i += 1
-            else:
-                self._to_sort[k] = right[j]
-                j += 1
-            k += 1
-            self.draw()
-
-        while i < len(left):
-            left[i].focused = True
-            self.draw()
-            left[i].focused = True
-            self._to_sort[k] = left[i]
-            i += 1
-            k += 1
-            self.draw()
-
-        while j < len(right):
-            right[j].focused = True
-            self.draw()
-            right[j].focused = True
-            self._to_sort[k] = right[j]
-            j += 1
-            k += 1
-            self.draw()
-
-    def __merge_sort(self, start: int, end: int) -> None:
-        """
-        Splits the list half and then merges them together again
-        :param start: Starting index
-        :param end: Ending index
-        """
-        if start < end:
-            mid = int((start + end) / 2)
-            self.__merge_sort(start, mid)
-            self.__merge_sort(mid+1, end)
-
-            self.__merge(start, mid, end)
-
-    def sort(self) -> None:
-        """
-        Runs the merge sort algorithm
-        """
-        self.__merge_sort(0, len(self._to_sort)-1)
-        self.complete = True
-        self.draw()
-
 
 class QuickSort(ShowSortingGUI):
-    def __init__(self, width: int, height: int, elements: int) -> None:
+    """
+    Runs and displays a Quick Sort
+    """
+    def __init__(self, width: int, height: int, elements: int, headless: bool = False, pivot: str = "median-of-three",
+                 three_way: bool = False) -> None:
         """
         :param width: Width of the window
         :param height: Height of the window
         :param elements: Number of elements to sort
+        :param headless: If True runs without opening a window
+        :param pivot: How the pivot is picked, one of sortengine.PIVOTS
+        :param three_way: If True values equal to the pivot are gathered in the middle of each section
         """
-        super().__init__(width, height, "Quick Sort", frame_length=0.02)
+        super().__init__(width, height, "Quick Sort", "quick", frame_length=0.02, headless=headless)
+        self._sort_options = {"pivot": pivot, "three_way": three_way}
         self._to_sort = self.generate_values_to_sort(elements)
         self.draw()
-
-    def partition(self, arr: list[SortingElement], low: int, high: int) -> int:
-        """
-        Given an array and an element x of array as pivot, put x at its correct position in sorted array.
-        :param arr: The array being sorted
-        :param low: The starting index
-        :param high: The ending index (and initial pivot point)
-        :return: The
-        """
-        i = low - 1
-        # I'm using the last point as the pivot
-        pivot = arr[high]
-
-        for j in range(low, high):
-            arr[i].focused = True
-            arr[j].focused = True
-            self.draw()
-            arr[i].focused = True
-            arr[j].focused = True
-            if arr[j] <= pivot:
-                i += 1
-                arr[i], arr[j] = arr[j], arr[i]
-            self.draw()
-        arr[i+1].focused = True
-        arr[high].focused = True
-        self.draw()
-        arr[i + 1], arr[high] = arr[high], arr[i + 1]
-        arr[i + 1].focused = True
-        arr[high].focused = True
-        self.draw()
-        return i + 1
-
-    def quick_sort(self, arr: list[SortingElement], low: int, high: int):
-        """
-        Main function for quick sort
-        :param arr: The array being sorted
-        :param low: The starting index
-        :param high: The ending index
-        """
-        if len(arr) == 1:
-            return arr
-        if low < high:
-            partitioning_index = self.partition(arr, low, high)
-
-            self.quick_sort(arr, low, partitioning_index-1)
-            self.quick_sort(arr, partitioning_index+1, high)
-
-    def sort(self) -> None:
-        """
-        Runs the Quick Sort algorithm
-        """
-        self.quick_sort(self._to_sort, 0, len(self._to_sort)-1)
-        self.complete = True
-        self.draw()